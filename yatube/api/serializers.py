@@ -0,0 +1,40 @@
+def image_url(image):
+    return image.url if image else None
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'image': image_url(post.image),
+        'comments_count': post.comments_count,
+    }
+
+
+def serialize_group(group):
+    return {
+        'id': group.pk,
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'post': comment.post_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+    }
+
+
+def serialize_follow(follow):
+    return {
+        'id': follow.pk,
+        'author': follow.author.username,
+    }
@@ -0,0 +1,167 @@
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import CursorPaginator
+
+User = get_user_model()
+
+
+def read(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0],
+            author=cls.author,
+            text='Комментарий',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def get_json(self, url, **params):
+        response = self.guest_client.get(url, params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(read(response))
+
+    def test_posts_follow_cursors(self):
+        """Страницы постов переходят по курсорам без пропусков."""
+        url = reverse('api:posts')
+        data = self.get_json(url, limit=2)
+        ids = [post['id'] for post in data['results']]
+        self.assertIsNone(data['previous'])
+        while data['next']:
+            data = self.get_json(data['next'])
+            ids.extend(post['id'] for post in data['results'])
+        self.assertEqual(ids, [post.pk for post in self.posts[::-1]])
+        self.assertEqual(data['results'][0]['author'], 'Автор')
+
+    def test_nested_lists(self):
+        """Посты группы, автора и комментарии поста отфильтрованы."""
+        for url, expected in (
+            (
+                reverse('api:group_posts', args=(self.group.slug,)),
+                [self.posts[3].pk, self.posts[1].pk],
+            ),
+            (
+                reverse('api:user_posts', args=(self.author.username,)),
+                [post.pk for post in self.posts[::-1]],
+            ),
+            (
+                reverse('api:comments', args=(self.posts[0].pk,)),
+                list(Comment.objects.values_list('pk', flat=True)),
+            ),
+            (reverse('api:groups'), [self.group.pk]),
+        ):
+            with self.subTest(url=url):
+                data = self.get_json(url)
+                self.assertEqual(
+                    [obj['id'] for obj in data['results']],
+                    expected,
+                )
+
+    def test_ndjson_export(self):
+        """Выгрузка NDJSON отдаёт все строки после курсора."""
+        response = self.guest_client.get(
+            reverse('api:posts'),
+            {'format': 'ndjson', 'limit': 1},
+        )
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = read(response).splitlines()
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines],
+            [post.pk for post in self.posts[::-1]],
+        )
+
+    def test_conditional_get(self):
+        """Повторный запрос с ETag получает 304 до изменения данных."""
+        url = reverse('api:posts')
+        response = self.guest_client.get(url)
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follows_require_login(self):
+        """Подписки доступны только авторизованному пользователю."""
+        url = reverse('api:follows')
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        reader = User.objects.create_user(username='Читатель')
+        Follow.objects.create(user=reader, author=self.author)
+        self.guest_client.force_login(reader)
+        data = self.get_json(url)
+        self.assertEqual(
+            [follow['author'] for follow in data['results']],
+            ['Автор'],
+        )
+
+    def test_follow_bulk(self):
+        """Подписки и отписки списками имён одним запросом."""
+        url = reverse('api:follows_bulk')
+        response = self.guest_client.post(
+            url, '{}', content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        reader = User.objects.create_user(username='Читатель')
+        other = User.objects.create_user(username='Другой')
+        Follow.objects.create(user=reader, author=other)
+        self.guest_client.force_login(reader)
+
+        response = self.guest_client.post(
+            url,
+            json.dumps({
+                'follow': ['Автор', 'Читатель', 'Неизвестный'],
+                'unfollow': ['Другой'],
+            }),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(json.loads(response.content), {
+            'followed': 1,
+            'unfollowed': 1,
+            'not_found': ['Неизвестный'],
+        })
+        self.assertEqual(
+            list(Follow.objects.values_list('user', 'author')),
+            [(reader.pk, self.author.pk)],
+        )
+        response = self.guest_client.post(
+            url, '{"follow": "Автор"}', content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_unordered_queryset_rejected(self):
+        """Курсорный пагинатор не принимает запрос без сортировки."""
+        with self.assertRaises(ValueError):
+            CursorPaginator(Group.objects.all(), 10, ordering=('id',))
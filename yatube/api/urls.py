@@ -0,0 +1,27 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/posts/', views.post_list, name='posts'),
+    path(
+        'v1/posts/<int:post_id>/comments/',
+        views.comment_list,
+        name='comments'
+    ),
+    path('v1/groups/', views.group_list, name='groups'),
+    path(
+        'v1/groups/<slug:slug>/posts/',
+        views.group_post_list,
+        name='group_posts'
+    ),
+    path(
+        'v1/users/<str:username>/posts/',
+        views.user_post_list,
+        name='user_posts'
+    ),
+    path('v1/follows/', views.follow_list, name='follows'),
+    path('v1/follows/bulk/', views.follow_bulk, name='follows_bulk'),
+]
@@ -0,0 +1,201 @@
+import json
+from functools import wraps
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST, require_safe
+
+from posts.cache import conditional_page
+from posts.following import bulk_follow, bulk_unfollow
+from posts.models import Follow, Group, Post
+from posts.paginator import CURSOR_ORDERING, CursorPaginator
+
+from .serializers import (serialize_comment, serialize_follow,
+                          serialize_group, serialize_post)
+
+User = get_user_model()
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+CHUNK_SIZE = 2000
+MAX_BULK_SIZE = 1000
+JSON = 'application/json'
+NDJSON = 'application/x-ndjson'
+
+
+def dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def get_limit(params):
+    try:
+        limit = int(params.get('limit', PAGE_SIZE))
+    except ValueError:
+        return PAGE_SIZE
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def page_url(request, cursor_name, cursor):
+    if not cursor:
+        return None
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params[cursor_name] = cursor
+    return request.build_absolute_uri(f'?{params.urlencode()}')
+
+
+def render_page(request, page, serializer):
+    """Страница JSON по частям: объект за объектом."""
+    yield '{"results": ['
+    for number, obj in enumerate(page):
+        yield (', ' if number else '') + dumps(serializer(obj))
+    yield '], "next": {}, "previous": {}}}'.format(
+        dumps(page_url(request, 'after', page.next_cursor)),
+        dumps(page_url(request, 'before', page.previous_cursor)),
+    )
+
+
+def stream_list(request, queryset, serializer, ordering=CURSOR_ORDERING):
+    """
+    Ответ списка: страница JSON по курсору или, при `format=ndjson`,
+    все строки после курсора `after` построчно, чанками из БД.
+    """
+    paginator = CursorPaginator(queryset, get_limit(request.GET), ordering)
+    if request.GET.get('format') == 'ndjson':
+        rows = paginator.stream(request.GET.get('after'), CHUNK_SIZE)
+        return StreamingHttpResponse(
+            (dumps(serializer(obj)) + '\n' for obj in rows),
+            content_type=NDJSON,
+        )
+    page = paginator.cursor_page(
+        request.GET.get('after'),
+        request.GET.get('before'),
+    )
+    return StreamingHttpResponse(
+        render_page(request, page, serializer),
+        content_type=JSON,
+    )
+
+
+def api_view(view):
+    return require_safe(conditional_page(view))
+
+
+@api_view
+def post_list(request):
+    post_list = Post.objects.select_related('author', 'group')
+    return stream_list(request, post_list, serialize_post)
+
+
+@api_view
+def group_post_list(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    post_list = Post.objects.select_related('author', 'group').filter(
+        group=group,
+    )
+    return stream_list(request, post_list, serialize_post)
+
+
+@api_view
+def user_post_list(request, username):
+    author = get_object_or_404(User, username=username)
+    post_list = Post.objects.select_related('author', 'group').filter(
+        author=author,
+    )
+    return stream_list(request, post_list, serialize_post)
+
+
+@api_view
+def group_list(request):
+    return stream_list(
+        request,
+        Group.objects.order_by('id'),
+        serialize_group,
+        ordering=('id',),
+    )
+
+
+@api_view
+def comment_list(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    return stream_list(
+        request,
+        post.comments.select_related('author'),
+        serialize_comment,
+        ordering=('created', 'id'),
+    )
+
+
+def login_required_json(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Требуется авторизация.'},
+                status=HTTPStatus.FORBIDDEN,
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@api_view
+@login_required_json
+def follow_list(request):
+    return stream_list(
+        request,
+        Follow.objects.select_related('author').filter(
+            user=request.user,
+        ).order_by('-id'),
+        serialize_follow,
+        ordering=('-id',),
+    )
+
+
+def read_usernames(data, name):
+    usernames = data.get(name, [])
+    if not isinstance(usernames, list) or not all(
+        isinstance(username, str) for username in usernames
+    ):
+        raise ValueError(f'"{name}" должен быть списком имён.')
+    return set(usernames)
+
+
+@require_POST
+@login_required_json
+def follow_bulk(request):
+    """
+    Подписки и отписки текущего пользователя списками имён:
+    {"follow": [...], "unfollow": [...]}, не больше MAX_BULK_SIZE.
+    """
+    try:
+        data = json.loads(request.body)
+        follow = read_usernames(data, 'follow')
+        unfollow = read_usernames(data, 'unfollow')
+    except (AttributeError, ValueError) as error:
+        return JsonResponse(
+            {'detail': f'Некорректный запрос: {error}'},
+            status=HTTPStatus.BAD_REQUEST,
+        )
+    if len(follow) + len(unfollow) > MAX_BULK_SIZE:
+        return JsonResponse(
+            {'detail': f'Не больше {MAX_BULK_SIZE} имён за запрос.'},
+            status=HTTPStatus.BAD_REQUEST,
+        )
+    users = dict(
+        User.objects.filter(username__in=follow | unfollow)
+        .values_list('username', 'id')
+    )
+    user_id = request.user.pk
+    return JsonResponse({
+        'followed': bulk_follow(
+            (user_id, users[name]) for name in follow if name in users
+        ),
+        'unfollowed': bulk_unfollow(
+            (user_id, users[name]) for name in unfollow if name in users
+        ),
+        'not_found': sorted((follow | unfollow) - users.keys()),
+    })
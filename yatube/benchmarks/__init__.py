@@ -0,0 +1,4 @@
+"""
+Нагрузочные замеры приложения posts: синтетические данные
+и сценарии запросов через тестовый клиент Django.
+"""
@@ -0,0 +1,94 @@
+import random
+
+from django.contrib.auth import get_user_model
+from faker import Faker
+
+from posts import counters, search
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+DEFAULT_SCALE = {
+    'users': 200,
+    'groups': 10,
+    'posts': 2000,
+    'comments': 4000,
+    'follows': 2000,
+}
+
+
+def seed(scale=None, random_seed=0):
+    """
+    Заполняет БД синтетическими данными пачками bulk_create и
+    пересчитывает счётчики и поисковый индекс. Посты не разносятся
+    по лентам подписчиков и подмешиваются в ленту при чтении.
+    Возвращает идентификаторы для сценариев.
+    """
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    rng = random.Random(random_seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+
+    User.objects.bulk_create(
+        (
+            User(
+                username=f'user{number}',
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+            )
+            for number in range(scale['users'])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    Group.objects.bulk_create(
+        (
+            Group(
+                title=fake.sentence(nb_words=3)[:200],
+                slug=f'group-{number}',
+                description=fake.paragraph(),
+            )
+            for number in range(scale['groups'])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    group_ids = list(Group.objects.values_list('id', flat=True))
+    Post.objects.bulk_create(
+        (
+            Post(
+                text=fake.paragraph(nb_sentences=5),
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids + [None]),
+            )
+            for _ in range(scale['posts'])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                text=fake.sentence(),
+                post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+            )
+            for _ in range(scale['comments'])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    pairs = {
+        tuple(rng.sample(user_ids, 2))
+        for _ in range(scale['follows'])
+    }
+    Follow.objects.bulk_create(
+        (Follow(user_id=user, author_id=author) for user, author in pairs),
+        batch_size=BATCH_SIZE,
+    )
+    counters.recount()
+    search.rebuild_index()
+    return {
+        'usernames': list(User.objects.values_list('username', flat=True)),
+        'group_slugs': list(Group.objects.values_list('slug', flat=True)),
+        'post_ids': post_ids,
+    }
@@ -0,0 +1,197 @@
+import random
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import UserCounter
+
+User = get_user_model()
+
+QUANTILES = (50, 95, 99)
+WRITE_SCENARIOS = ('post_create', 'add_comment')
+
+
+def index(client, data, rng):
+    return client.get(reverse('posts:index'))
+
+
+def group_list(client, data, rng):
+    slug = rng.choice(data['group_slugs'])
+    return client.get(reverse('posts:group_list', args=(slug,)))
+
+
+def profile(client, data, rng):
+    username = rng.choice(data['usernames'])
+    return client.get(reverse('posts:profile', args=(username,)))
+
+
+def post_detail(client, data, rng):
+    post_id = rng.choice(data['post_ids'])
+    return client.get(reverse('posts:post_detail', args=(post_id,)))
+
+
+def follow_index(client, data, rng):
+    return client.get(reverse('posts:follow_index'))
+
+
+def post_create(client, data, rng):
+    return client.post(
+        reverse('posts:post_create'),
+        {'text': f'Пост нагрузочного теста {rng.random()}'},
+    )
+
+
+def add_comment(client, data, rng):
+    post_id = rng.choice(data['post_ids'])
+    return client.post(
+        reverse('posts:add_comment', args=(post_id,)),
+        {'text': 'Комментарий нагрузочного теста'},
+    )
+
+
+# Имя, нужна ли авторизация, сценарий. Запись идёт после чтения.
+SCENARIOS = (
+    ('index', False, index),
+    ('group_list', False, group_list),
+    ('profile', False, profile),
+    ('post_detail', False, post_detail),
+    ('follow_index', True, follow_index),
+    ('post_create', True, post_create),
+    ('add_comment', True, add_comment),
+)
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) * percent // 100, len(values) - 1)]
+
+
+def latency(timings):
+    return {
+        f'p{percent}_ms': round(percentile(timings, percent) * 1000, 2)
+        for percent in QUANTILES
+    }
+
+
+def summarize(timings, queries):
+    return {
+        'requests': len(timings),
+        'rps': round(len(timings) / sum(timings), 1),
+        **latency(timings),
+        'queries_mean': round(statistics.mean(queries), 2),
+        'queries_max': max(queries),
+    }
+
+
+@override_settings(DEBUG=False, RATE_LIMITS={})
+def run(data, requests=50, random_seed=0):
+    """
+    Прогоняет каждый сценарий `requests` раз и возвращает
+    пропускную способность, квантили задержки и число запросов к БД.
+    DEBUG выключен, чтобы не мерить debug_toolbar, лимиты частоты —
+    чтобы замер упирался в БД, а не в ответы 429.
+    """
+    rng = random.Random(random_seed)
+    reader_id = UserCounter.objects.order_by(
+        '-following_count',
+    ).values_list('user_id', flat=True).first()
+    guest = Client()
+    member = Client()
+    member.force_login(User.objects.get(pk=reader_id))
+    cache.clear()
+    report = {}
+    for name, authenticated, scenario in SCENARIOS:
+        client = member if authenticated else guest
+        timings = []
+        queries = []
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as context:
+                start = perf_counter()
+                response = scenario(client, data, rng)
+                timings.append(perf_counter() - start)
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name}: HTTP {response.status_code}')
+            queries.append(len(context))
+        report[name] = summarize(timings, queries)
+    return report
+
+
+@override_settings(DEBUG=False, RATE_LIMITS={})
+def run_concurrent(data, threads=8, requests=50, random_seed=0):
+    """
+    Пишущие сценарии из `threads` потоков одновременно, у каждого
+    потока свой пользователь и своё соединение с БД. Ошибки БД
+    (например, «database is locked» в SQLite) считаются, а не
+    прерывают замер. Лимиты частоты выключены, как и в run.
+    """
+    scenarios = {name: scenario for name, _, scenario in SCENARIOS}
+    users = list(User.objects.filter(username__in=data['usernames'][:threads]))
+
+    def worker(number, scenario):
+        rng = random.Random(random_seed + number)
+        client = Client()
+        timings = []
+        errors = 0
+        try:
+            client.force_login(users[number % len(users)])
+            for _ in range(requests):
+                start = perf_counter()
+                try:
+                    failed = scenario(client, data, rng).status_code >= 400
+                except DatabaseError:
+                    failed = True
+                timings.append(perf_counter() - start)
+                errors += failed
+        finally:
+            connections.close_all()
+        return timings, errors
+
+    report = {}
+    for name in WRITE_SCENARIOS:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            start = perf_counter()
+            results = list(executor.map(
+                worker,
+                range(threads),
+                [scenarios[name]] * threads,
+            ))
+            elapsed = perf_counter() - start
+        timings = [timing for result, _ in results for timing in result]
+        report[name] = {
+            'threads': threads,
+            'requests': len(timings),
+            'errors': sum(errors for _, errors in results),
+            'rps': round(len(timings) / elapsed, 1),
+            **latency(timings),
+        }
+    return report
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Регрессии относительно сохранённого отчёта: рост p95 больше
+    допуска или любой рост максимального числа запросов.
+    """
+    regressions = []
+    for name, expected in baseline.items():
+        actual = report.get(name)
+        if actual is None:
+            continue
+        limit = expected['p95_ms'] * (1 + tolerance)
+        if actual['p95_ms'] > limit:
+            regressions.append(
+                f'{name}: p95 {actual["p95_ms"]} мс > {limit:.2f} мс'
+            )
+        if actual['queries_max'] > expected['queries_max']:
+            regressions.append(
+                f'{name}: запросов {actual["queries_max"]} > '
+                f'{expected["queries_max"]}'
+            )
+    return regressions
@@ -0,0 +1,251 @@
+import pickle
+import socket
+import threading
+from urllib.parse import urlsplit
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+DEFAULT_PORT = 6379
+SOCKET_TIMEOUT = 5
+
+
+class RespError(Exception):
+    """Ошибка, которую вернул сервер."""
+
+
+class RespConnection:
+    """Соединение с сервером по протоколу Redis (RESP2)."""
+
+    def __init__(self, host, port, db=0, password=None,
+                 timeout=SOCKET_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+
+    def connect(self):
+        self.sock = socket.create_connection(
+            (self.host, self.port),
+            self.timeout,
+        )
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+        if self.password:
+            self._call([('AUTH', self.password)])
+        if self.db:
+            self._call([('SELECT', self.db)])
+
+    def close(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+        self.sock = None
+        self.reader = None
+
+    def execute(self, *command):
+        return self.pipeline([command])[0]
+
+    def pipeline(self, commands):
+        """
+        Отправляет команды одним пакетом и читает ответы. Оборванное
+        соединение переоткрывается один раз.
+        """
+        for attempt in range(2):
+            if self.sock is None:
+                self.connect()
+            try:
+                return self._call(commands)
+            except (OSError, EOFError):
+                self.close()
+                if attempt:
+                    raise
+
+    def _call(self, commands):
+        self.sock.sendall(b''.join(map(self._encode, commands)))
+        replies = [self._read() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    @staticmethod
+    def _encode(command):
+        parts = [b'*%d\r\n' % len(command)]
+        for arg in command:
+            if isinstance(arg, str):
+                arg = arg.encode()
+            elif isinstance(arg, int):
+                arg = b'%d' % arg
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise EOFError('Соединение закрыто сервером')
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode()
+        if kind == b'-':
+            return RespError(body.decode())
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(body)
+            if length < 0:
+                return None
+            return [self._read() for _ in range(length)]
+        raise RespError(f'Неизвестный ответ сервера: {line!r}')
+
+
+class RedisCache(BaseCache):
+    """
+    Общий для всех процессов кеш на сервере с протоколом Redis
+    без сторонних клиентов. LOCATION: redis://[:пароль@]хост[:порт][/база].
+    Значения хранятся в pickle, целые — как есть, чтобы работал INCRBY.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        url = urlsplit(location or 'redis://127.0.0.1')
+        self._address = {
+            'host': url.hostname or '127.0.0.1',
+            'port': url.port or DEFAULT_PORT,
+            'db': int(url.path.strip('/') or 0),
+            'password': url.password,
+            'timeout': params.get('OPTIONS', {}).get(
+                'SOCKET_TIMEOUT', SOCKET_TIMEOUT,
+            ),
+        }
+        self._local = threading.local()
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = RespConnection(**self._address)
+            self._local.connection = connection
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expiry(self, timeout):
+        """Срок жизни в миллисекундах; None — бессрочно, 0 — уже истёк."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 0)
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(data):
+        if data is None:
+            return None
+        try:
+            return int(data)
+        except ValueError:
+            return pickle.loads(data)
+
+    def _set_command(self, key, value, expiry, *flags):
+        command = ['SET', key, self._dump(value), *flags]
+        if expiry is not None:
+            command += ['PX', expiry]
+        return command
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        expiry = self._expiry(timeout)
+        if expiry == 0:
+            return False
+        return self._connection.execute(
+            *self._set_command(self._key(key, version), value, expiry, 'NX')
+        ) is not None
+
+    def get(self, key, default=None, version=None):
+        data = self._connection.execute('GET', self._key(key, version))
+        return default if data is None else self._load(data)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expiry = self._expiry(timeout)
+        if expiry == 0:
+            self._connection.execute('DEL', key)
+        else:
+            self._connection.execute(
+                *self._set_command(key, value, expiry)
+            )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expiry = self._expiry(timeout)
+        if expiry is None:
+            self._connection.execute('PERSIST', key)
+            return bool(self._connection.execute('EXISTS', key))
+        return bool(self._connection.execute('PEXPIRE', key, expiry))
+
+    def delete(self, key, version=None):
+        self._connection.execute('DEL', self._key(key, version))
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        made = [self._key(key, version) for key in keys]
+        values = self._connection.execute('MGET', *made)
+        return {
+            key: self._load(data)
+            for key, data in zip(keys, values)
+            if data is not None
+        }
+
+    def has_key(self, key, version=None):
+        return bool(
+            self._connection.execute('EXISTS', self._key(key, version))
+        )
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        if not self._connection.execute('EXISTS', key):
+            raise ValueError(f"Key '{key}' not found")
+        return self._connection.execute('INCRBY', key, delta)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        expiry = self._expiry(timeout)
+        if expiry == 0:
+            self.delete_many(data, version)
+            return []
+        self._connection.pipeline([
+            self._set_command(self._key(key, version), value, expiry)
+            for key, value in data.items()
+        ])
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._connection.execute('DEL', *keys)
+
+    def clear(self):
+        self._connection.execute('FLUSHDB')
+
+    def close(self, **kwargs):
+        """Соединения потоков живут между запросами."""
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Фрагменты страниц кешируются на час, а версию страниц сбрасывает
+    воркер, обработавший запись. С кешем в памяти процесса остальные
+    воркеры отдавали бы устаревшие страницы.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.TESTING or backend not in LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            'Кеш по умолчанию не общий для процессов: сброс версии '
+            'страниц не дойдёт до других воркеров.',
+            hint='Задайте CACHE_BACKEND=db, file или redis.',
+            id='core.W001',
+        )
+    ]
@@ -0,0 +1,67 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def pin_primary():
+    """До конца запроса все чтения идут в основную БД."""
+    _state.pinned = True
+
+
+def unpin():
+    """Сбрасывает закрепление и отметку о записи в конце запроса."""
+    _state.pinned = False
+    _state.wrote = False
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def has_written():
+    """Была ли в запросе запись через роутер, каким бы ни был метод."""
+    return getattr(_state, 'wrote', False)
+
+
+class ReplicaRouter:
+    """
+    Чтение моделей posts и пользователей — с реплик из
+    DATABASE_REPLICAS, запись — в основную БД. После записи
+    и внутри транзакции чтение тоже идёт в основную БД.
+    """
+
+    route_app_labels = {'posts', 'users', 'auth'}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or is_pinned()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        pin_primary()
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
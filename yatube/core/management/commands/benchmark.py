@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from benchmarks import data, runner
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет тестовую БД синтетическими данными, прогоняет '
+        'сценарии posts и печатает отчёт в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in data.DEFAULT_SCALE.items():
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                default=default,
+                help=f'Число объектов: {name}.',
+            )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Число запросов в каждом сценарии.',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=0,
+            help='Потоков для параллельной записи; 0 — не замерять.',
+        )
+        parser.add_argument(
+            '--no-sqlite-tuning',
+            action='store_true',
+            help='Замер без SQLITE_PRAGMAS, для сравнения.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для отчёта.')
+        parser.add_argument(
+            '--baseline',
+            help='Отчёт для сравнения: регрессия завершает команду ошибкой.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Допустимый рост p95 относительно базового отчёта.',
+        )
+
+    def handle(self, *args, **options):
+        pragmas = settings.SQLITE_PRAGMAS
+        if options['no_sqlite_tuning']:
+            pragmas = {}
+        with tempfile.TemporaryDirectory() as directory:
+            if options['threads'] and connection.vendor == 'sqlite':
+                # Потокам нужна общая БД в файле, а не в памяти.
+                connection.settings_dict['TEST']['NAME'] = os.path.join(
+                    directory, 'benchmark.sqlite3',
+                )
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                report = self.run_benchmark(options)
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+            regressions = runner.compare(
+                report['scenarios'],
+                baseline['scenarios'],
+                options['tolerance'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n' + '\n'.join(regressions)
+                )
+
+    def run_benchmark(self, options):
+        scale = {name: options[name] for name in data.DEFAULT_SCALE}
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            ids = data.seed(scale, options['seed'])
+            report = {
+                'scale': scale,
+                'requests': options['requests'],
+                'scenarios': runner.run(
+                    ids,
+                    options['requests'],
+                    options['seed'],
+                ),
+            }
+            if options['threads']:
+                report['concurrent'] = runner.run_concurrent(
+                    ids,
+                    options['threads'],
+                    options['requests'],
+                    options['seed'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        return report
@@ -0,0 +1,46 @@
+import json
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+COLUMNS = (
+    ('request_duration_seconds', 'время, мс', 1000),
+    ('db_queries', 'запросы', 1),
+    ('db_duration_seconds', 'БД, мс', 1000),
+    ('render_duration_seconds', 'шаблоны, мс', 1000),
+    ('response_size_bytes', 'ответ, КБ', 1 / 1024),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает p50/p95/p99 метрик представлений '
+        'работающего сервера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:8000/metrics/',
+            help='Адрес страницы метрик.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with urlopen(f'{options["url"]}?format=json') as response:
+                data = json.load(response)
+        except (URLError, ValueError) as exc:
+            raise CommandError(f'Не удалось получить метрики: {exc}')
+        for view_name, metrics in data.items():
+            count = metrics['request_duration_seconds']['count']
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(f'{view_name} ({count})')
+            )
+            for name, title, scale in COLUMNS:
+                summary = metrics[name]
+                values = ' / '.join(
+                    f'{summary.get(quantile, 0) * scale:.1f}'
+                    for quantile in ('0.5', '0.95', '0.99')
+                )
+                self.stdout.write(f'  {title:<12} {values}')
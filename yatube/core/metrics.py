@@ -0,0 +1,135 @@
+import threading
+from collections import deque
+from time import perf_counter
+
+WINDOW = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+METRICS = {
+    'request_duration_seconds': 'Время обработки запроса.',
+    'db_queries': 'Число запросов к БД за запрос.',
+    'db_duration_seconds': 'Время запросов к БД за запрос.',
+    'render_duration_seconds': 'Время рендеринга шаблонов за запрос.',
+    'response_size_bytes': 'Размер ответа.',
+}
+PREFIX = 'yatube_'
+
+_histograms = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class Histogram:
+    """
+    Скользящее окно последних значений для квантилей
+    и накопленные сумма и число наблюдений.
+    """
+
+    def __init__(self, size=WINDOW):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def summary(self):
+        values = sorted(self.samples)
+        summary = {'count': self.count, 'sum': self.sum}
+        if values:
+            for quantile in QUANTILES:
+                index = min(int(quantile * len(values)), len(values) - 1)
+                summary[str(quantile)] = values[index]
+        return summary
+
+
+class RequestStats:
+    """Показатели одного запроса, которые копятся по ходу обработки."""
+
+    __slots__ = ('queries', 'db_time', 'render_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.render_time = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper()."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - start
+
+
+def start_request():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def finish_request():
+    _local.stats = None
+
+
+def add_render_time(seconds):
+    stats = getattr(_local, 'stats', None)
+    if stats is not None:
+        stats.render_time += seconds
+
+
+def observe(view_name, duration, stats, size):
+    values = {
+        'request_duration_seconds': duration,
+        'db_queries': stats.queries,
+        'db_duration_seconds': stats.db_time,
+        'render_duration_seconds': stats.render_time,
+        'response_size_bytes': size,
+    }
+    with _lock:
+        histograms = _histograms.get(view_name)
+        if histograms is None:
+            histograms = _histograms[view_name] = {
+                name: Histogram() for name in METRICS
+            }
+        for name, value in values.items():
+            histograms[name].observe(value)
+
+
+def snapshot():
+    """Сводка по представлениям: число, сумма и квантили метрик."""
+    with _lock:
+        return {
+            view_name: {
+                name: histogram.summary()
+                for name, histogram in histograms.items()
+            }
+            for view_name, histograms in sorted(_histograms.items())
+        }
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def to_prometheus(data):
+    """Сводка в текстовом формате Prometheus (тип summary)."""
+    lines = []
+    for name, help_text in METRICS.items():
+        metric = PREFIX + name
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} summary')
+        for view_name, metrics in data.items():
+            summary = metrics[name]
+            label = f'view="{view_name}"'
+            for quantile in QUANTILES:
+                if str(quantile) in summary:
+                    lines.append(
+                        f'{metric}{{{label},quantile="{quantile}"}} '
+                        f'{summary[str(quantile)]}'
+                    )
+            lines.append(f'{metric}_sum{{{label}}} {summary["sum"]}')
+            lines.append(f'{metric}_count{{{label}}} {summary["count"]}')
+    return '\n'.join(lines) + '\n'
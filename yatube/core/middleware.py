@@ -0,0 +1,162 @@
+import mimetypes
+import os
+from contextlib import ExitStack
+from time import perf_counter, time
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+from . import db_router, metrics
+
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def response_size(response):
+    if response.streaming:
+        return int(response.get('Content-Length', 0))
+    return len(response.content)
+
+
+class PerformanceMiddleware:
+    """
+    Собирает по имени представления время ответа, число и время
+    запросов к БД, время рендеринга и размер ответа. Для потоковых
+    ответов время не включает отдачу тела.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.start_request()
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request()
+        duration = perf_counter() - start
+        match = request.resolver_match
+        if match is not None:
+            metrics.observe(
+                match.view_name,
+                duration,
+                stats,
+                response_size(response),
+            )
+        return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes для реплик: запрос, который что-то записал через
+    роутер (или пришёл не безопасным методом), ставит cookie
+    на REPLICA_PIN_SECONDS, и пока она жива, чтения этого клиента идут
+    в основную БД, например на странице после редиректа. Запись
+    учитывается и в GET: подписка и отписка меняют данные по ссылке.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+        try:
+            pinned_until = float(
+                request.COOKIES.get(settings.REPLICA_PIN_COOKIE, 0)
+            )
+        except ValueError:
+            pinned_until = 0
+        db_router.unpin()
+        if writes or pinned_until > time():
+            db_router.pin_primary()
+        try:
+            response = self.get_response(request)
+            writes = writes or db_router.has_written()
+        finally:
+            db_router.unpin()
+        if writes:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                str(time() + settings.REPLICA_PIN_SECONDS),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class StaticFilesMiddleware:
+    """
+    Отдаёт собранную статику из STATIC_ROOT, выбирая сжатую копию
+    по Accept-Encoding. Файлы с хешем в имени кешируются на год.
+    Без STATIC_ROOT не подключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.immutable = None
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path.startswith(settings.STATIC_URL)
+        ):
+            response = self.serve(
+                request,
+                request.path[len(settings.STATIC_URL):],
+            )
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        content_type, _ = mimetypes.guess_type(path)
+        header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        accepted = {
+            token.split(';')[0].strip() for token in header.split(',')
+        }
+        encoding = None
+        for candidate, suffix in STATIC_ENCODINGS:
+            if candidate in accepted and os.path.isfile(path + suffix):
+                encoding = candidate
+                path += suffix
+                break
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if name in self.immutable_names():
+            response['Cache-Control'] = (
+                f'public, max-age={STATIC_MAX_AGE}, immutable'
+            )
+        else:
+            response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    def immutable_names(self):
+        if self.immutable is None:
+            hashed_names = getattr(staticfiles_storage, 'hashed_names', None)
+            self.immutable = hashed_names() if hashed_names else set()
+        return self.immutable
@@ -0,0 +1,69 @@
+import math
+import time
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+KEY_PREFIX = 'ratelimit'
+
+# Чем различаются вёдра одного действия: RATE_LIMITS['comment:post']
+# ограничивает комментарии к одному посту от всех пользователей.
+SCOPES = {
+    'user': lambda request, kwargs: (
+        request.user.pk or request.META.get('REMOTE_ADDR')
+    ),
+    'post': lambda request, kwargs: kwargs.get('post_id'),
+}
+
+
+def consume(name, key, rate, capacity):
+    """
+    Берёт токен из ведра `name` для `key`: ведро вмещает `capacity`
+    токенов и пополняется на `rate` в секунду. Возвращает 0, если
+    токен есть, иначе сколько секунд ждать. Ведро лежит в общем кеше;
+    одновременные запросы могут немного превысить лимит.
+    """
+    now = time.time()
+    cache_key = f'{KEY_PREFIX}:{name}:{key}'
+    tokens, updated = cache.get(cache_key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate
+    cache.set(cache_key, (tokens - 1, now), math.ceil(capacity / rate))
+    return 0
+
+
+def retry_after(action, request, kwargs):
+    """Сколько ждать до следующей записи действия; 0 — можно сейчас."""
+    for scope, get_key in SCOPES.items():
+        name = f'{action}:{scope}'
+        limit = settings.RATE_LIMITS.get(name)
+        if limit is None:
+            continue
+        wait = consume(name, get_key(request, kwargs), *limit)
+        if wait:
+            return wait
+    return 0
+
+
+def rate_limited(action):
+    """Ограничивает частоту POST-запросов к представлению по RATE_LIMITS."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                wait = retry_after(action, request, kwargs)
+                if wait:
+                    response = render(
+                        request,
+                        'core/429.html',
+                        status=HTTPStatus.TOO_MANY_REQUESTS,
+                    )
+                    response['Retry-After'] = math.ceil(wait)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
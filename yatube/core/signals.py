@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    """
+    Закрывает постоянные соединения, которые перестали отвечать,
+    чтобы запрос открыл новое вместо ошибки.
+    """
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+
+
+@receiver(post_migrate)
+def create_cache_table(sender, using, **kwargs):
+    """
+    Создаёт таблицу кеша в БД вместе с миграциями. Сигнал приходит
+    для каждого приложения с моделями, существующая таблица пропускается.
+    """
+    call_command('createcachetable', database=using, verbosity=0)
@@ -0,0 +1,61 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import brotli
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+COMPRESS_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.html', '.json', '.xml', '.map', '.ico',
+)
+MIN_SIZE = 256
+
+
+def compress_file(path):
+    """
+    Пишет рядом с файлом сжатые копии .gz и .br.
+    Сжатые копии, которые не меньше оригинала, не сохраняются.
+    """
+    with open(path, 'rb') as file:
+        content = file.read()
+    encoders = [
+        ('.gz', lambda data: gzip.compress(data, 9, mtime=0)),
+        ('.br', brotli.compress),
+    ]
+    written = []
+    for suffix, compress in encoders:
+        compressed = compress(content)
+        if len(compressed) < len(content):
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище статики с хешем содержимого в именах файлов и сжатыми
+    копиями, которые collectstatic готовит в пуле процессов.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = [
+            name for name in set(self.hashed_files.values())
+            if name.endswith(COMPRESS_EXTENSIONS)
+            and self.size(name) >= MIN_SIZE
+        ]
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(
+                compress_file,
+                [self.path(name) for name in names],
+            )
+            for name, written in zip(names, results):
+                for path in written:
+                    yield name, os.path.relpath(path, self.location), True
+
+    def hashed_names(self):
+        """Имена файлов с хешем: их можно кешировать навсегда."""
+        return set(self.hashed_files.values())
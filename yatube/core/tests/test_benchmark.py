@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.test import TestCase
+
+from benchmarks import data, runner
+from posts.models import Post
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_run_scenarios(self):
+        """Сценарии проходят на синтетических данных и дают отчёт."""
+        ids = data.seed({
+            'users': 5,
+            'groups': 2,
+            'posts': 20,
+            'comments': 10,
+            'follows': 10,
+        })
+        self.assertEqual(Post.objects.count(), 20)
+        report = runner.run(ids, requests=2)
+        self.assertEqual(
+            list(report),
+            [name for name, _, _ in runner.SCENARIOS],
+        )
+        for name, result in report.items():
+            with self.subTest(name=name):
+                self.assertEqual(result['requests'], 2)
+                self.assertGreater(result['queries_max'], 0)
+
+    def test_run_not_rate_limited(self):
+        """Сценарии записи не упираются в RATE_LIMITS."""
+        ids = data.seed({
+            'users': 2,
+            'groups': 1,
+            'posts': 5,
+            'comments': 0,
+            'follows': 1,
+        })
+        capacity = max(
+            capacity for _, capacity in settings.RATE_LIMITS.values()
+        )
+        report = runner.run(ids, requests=capacity + 1)
+        for name in runner.WRITE_SCENARIOS:
+            with self.subTest(name=name):
+                self.assertEqual(report[name]['requests'], capacity + 1)
+
+    def test_compare_reports_regressions(self):
+        """Рост p95 сверх допуска и рост числа запросов — регрессии."""
+        baseline = {'index': {'p95_ms': 10, 'queries_max': 1}}
+        self.assertEqual(
+            runner.compare({'index': {'p95_ms': 11, 'queries_max': 1}},
+                           baseline),
+            [],
+        )
+        self.assertEqual(
+            len(runner.compare({'index': {'p95_ms': 13, 'queries_max': 2}},
+                               baseline)),
+            2,
+        )
@@ -0,0 +1,201 @@
+import socket
+import socketserver
+import threading
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.cache_backends import RedisCache
+from core.checks import check_shared_cache
+from core.signals import create_cache_table
+
+COMMANDS = {'del': 'delete'}
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Подмножество команд Redis, которыми пользуется RedisCache."""
+
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        command = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            command.append(self.rfile.read(length + 2)[:-2])
+        return command
+
+    def handle(self):
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            name, *args = command
+            name = name.decode().lower()
+            reply = getattr(self, COMMANDS.get(name, name))(*args)
+            self.wfile.write(self.encode(reply))
+
+    def encode(self, reply):
+        if reply is None:
+            return b'$-1\r\n'
+        if isinstance(reply, int):
+            return b':%d\r\n' % reply
+        if isinstance(reply, list):
+            return b'*%d\r\n' % len(reply) + b''.join(map(self.encode, reply))
+        if reply == 'OK':
+            return b'+OK\r\n'
+        return b'$%d\r\n%s\r\n' % (len(reply), reply)
+
+    @property
+    def data(self):
+        now = time.time()
+        for key, (_, expires) in list(self.server.data.items()):
+            if expires is not None and expires <= now:
+                del self.server.data[key]
+        return self.server.data
+
+    def get(self, key):
+        return self.data.get(key, (None,))[0]
+
+    def set(self, key, value, *flags):
+        flags = [flag.upper() for flag in flags]
+        if b'NX' in flags and key in self.data:
+            return None
+        expires = None
+        if b'PX' in flags:
+            expires = time.time() + int(flags[flags.index(b'PX') + 1]) / 1000
+        self.data[key] = (value, expires)
+        return 'OK'
+
+    def mget(self, *keys):
+        return [self.get(key) for key in keys]
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def incrby(self, key, delta):
+        value = int(self.get(key) or 0) + int(delta)
+        self.data[key] = (b'%d' % value, self.data[key][1])
+        return value
+
+    def pexpire(self, key, milliseconds):
+        if key not in self.data:
+            return 0
+        expires = time.time() + int(milliseconds) / 1000
+        self.data[key] = (self.data[key][0], expires)
+        return 1
+
+    def persist(self, key):
+        if key not in self.data:
+            return 0
+        self.data[key] = (self.data[key][0], None)
+        return 1
+
+    def flushdb(self):
+        self.data.clear()
+        return 'OK'
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeRedisHandler)
+        self.data = {}
+
+
+class RedisCacheTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeRedisServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        host, port = cls.server.server_address
+        cls.cache = RedisCache(f'redis://{host}:{port}/0', {})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache.clear()
+
+    def test_values_round_trip(self):
+        """Значения любых типов сохраняются и читаются без потерь."""
+        values = {'text': 'Текст', 'number': 42, 'tuple': ('a', 1.5)}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(['text', 'number', 'tuple',
+                                              'missing']), values)
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+        self.cache.delete('text')
+        self.assertFalse(self.cache.has_key('text'))
+
+    def test_add_and_incr(self):
+        """add не перезаписывает значение, incr работает на сервере."""
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.get('counter'), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_timeouts(self):
+        """Срок жизни передаётся серверу, 0 удаляет значение."""
+        self.cache.set('short', 'value', 0.05)
+        self.cache.set('forever', 'value', None)
+        self.cache.set('gone', 'value', 0)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertEqual(self.cache.get('forever'), 'value')
+        self.assertIsNone(self.cache.get('gone'))
+
+    def test_reconnects_after_server_closes_connection(self):
+        """Оборванное соединение открывается заново."""
+        self.cache.set('key', 'value')
+        self.cache._connection.sock.shutdown(socket.SHUT_RDWR)
+        self.assertEqual(self.cache.get('key'), 'value')
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                'LOCATION': 'yatube_cache'},
+})
+class DatabaseCacheTests(TestCase):
+    def test_cache_table_created_by_migrate(self):
+        """Таблица кеша в БД создаётся вместе с миграциями."""
+        create_cache_table(apps.get_app_config('posts'), 'default')
+        cache = caches['default']
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(TESTING=False, CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    })
+    def test_local_cache_warns(self):
+        """Кеш в памяти процесса вне тестов даёт предупреждение."""
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)],
+            ['core.W001'],
+        )
+
+    @override_settings(TESTING=False, CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'yatube_cache',
+        },
+    })
+    def test_shared_cache_passes(self):
+        """Общий кеш в БД проверку проходит."""
+        self.assertEqual(check_shared_cache(None), [])
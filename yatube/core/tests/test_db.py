@@ -0,0 +1,122 @@
+from http import HTTPStatus
+from time import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from core.db_router import ReplicaRouter, unpin
+from core.middleware import ReplicaPinMiddleware
+from core.signals import check_connections
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class DatabaseTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_sqlite_pragmas_applied(self):
+        """Соединение SQLite получает настройки из SQLITE_PRAGMAS."""
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+
+    def test_unusable_connection_is_closed(self):
+        """Неотвечающее соединение закрывается в начале запроса."""
+        connection.ensure_connection()
+        with mock.patch.object(connection, 'is_usable', return_value=False):
+            with mock.patch.object(connection, 'close') as close:
+                check_connections()
+                close.assert_called_once()
+                close.reset_mock()
+                with override_settings(DB_HEALTH_CHECKS=False):
+                    check_connections()
+                close.assert_not_called()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        unpin()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_alias(self, request, write=False):
+        """Куда пошло бы чтение постов при обработке запроса."""
+        aliases = []
+
+        def get_response(request):
+            aliases.append(self.router.db_for_read(Post))
+            if write:
+                self.router.db_for_write(Follow)
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(get_response)(request)
+        return aliases[0], response
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        """Чтение идёт с реплики, запись — в основную БД."""
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        unpin()
+        self.assertIsNone(self.router.db_for_read(Session))
+
+    def test_reads_stick_to_primary_after_write(self):
+        """После POST чтения клиента идут в основную БД."""
+        alias, response = self.read_alias(self.factory.get('/'))
+        self.assertEqual(alias, 'replica')
+        alias, response = self.read_alias(self.factory.post('/'))
+        self.assertEqual(alias, 'default')
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = cookie.value
+        alias, response = self.read_alias(request)
+        self.assertEqual(alias, 'default')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = str(time() - 1)
+        alias, response = self.read_alias(request)
+        self.assertEqual(alias, 'replica')
+
+    def test_reads_stick_to_primary_after_write_on_get(self):
+        """Подписка по GET тоже закрепляет следующие чтения за основной БД."""
+        alias, response = self.read_alias(self.factory.get('/'), write=True)
+        self.assertEqual(alias, 'replica')
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = cookie.value
+        alias, response = self.read_alias(request)
+        self.assertEqual(alias, 'default')
+
+
+class ReplicaPinViewsTests(TransactionTestCase):
+    def test_follow_by_get_pins_redirected_read(self):
+        """После подписки по GET профиль читается из основной БД."""
+        author = User.objects.create_user(username='Автор')
+        reader = User.objects.create_user(username='Читатель')
+        self.client.force_login(reader)
+        # Реплика — та же БД: на время запросов, не до сброса таблиц
+        # после теста, иначе роутер исключит их из flush.
+        with override_settings(DATABASE_REPLICAS=['default']), \
+                mock.patch('core.db_router.random.choice') as choice:
+            choice.return_value = 'default'
+            response = self.client.get(
+                reverse('posts:profile_follow', args=[author.username]),
+            )
+            self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+            choice.reset_mock()
+            response = self.client.get(response.url)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertTrue(response.context['following'])
+            choice.assert_not_called()
+            self.client.cookies.pop(settings.REPLICA_PIN_COOKIE)
+            self.client.get(reverse('posts:index'))
+            choice.assert_called()
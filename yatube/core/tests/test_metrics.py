@@ -0,0 +1,65 @@
+import json
+from http import HTTPStatus
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PerformanceMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='Автор')
+        Post.objects.create(text='Текст', author=author)
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_view_metrics_are_recorded(self):
+        """Для представления копятся время, запросы и размер ответа."""
+        for _ in range(3):
+            response = self.client.get(reverse('posts:index'))
+        data = metrics.snapshot()['posts:index']
+        self.assertEqual(data['request_duration_seconds']['count'], 3)
+        self.assertGreater(data['db_queries']['0.5'], 0)
+        self.assertGreater(data['render_duration_seconds']['0.99'], 0)
+        self.assertEqual(
+            data['response_size_bytes']['0.5'],
+            len(response.content),
+        )
+
+    def test_prometheus_endpoint(self):
+        """Страница метрик отдаёт формат Prometheus внутренним адресам."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            response.content.decode(),
+        )
+        response = self.client.get(
+            reverse('core:metrics'),
+            REMOTE_ADDR='10.0.0.1',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_perf_stats_command(self):
+        """Команда perf_stats печатает квантили каждого представления."""
+        self.client.get(reverse('posts:index'))
+        body = json.dumps(metrics.snapshot()).encode()
+        out = StringIO()
+        with mock.patch(
+            'core.management.commands.perf_stats.urlopen',
+            return_value=BytesIO(body),
+        ):
+            call_command('perf_stats', stdout=out)
+        self.assertIn('posts:index (1)', out.getvalue())
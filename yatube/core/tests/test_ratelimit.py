@@ -0,0 +1,46 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.ratelimit import consume, rate_limited
+
+
+@rate_limited('comment')
+def view(request, post_id):
+    return HttpResponse()
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills_with_time(self):
+        """Ведро пустеет на ёмкости и пополняется со временем."""
+        with mock.patch('core.ratelimit.time.time', return_value=1000):
+            self.assertEqual(consume('test', 1, 1, 2), 0)
+            self.assertEqual(consume('test', 1, 1, 2), 0)
+            self.assertAlmostEqual(consume('test', 1, 1, 2), 1)
+            self.assertEqual(consume('test', 2, 1, 2), 0)
+        with mock.patch('core.ratelimit.time.time', return_value=1001):
+            self.assertEqual(consume('test', 1, 1, 2), 0)
+
+    @override_settings(RATE_LIMITS={'comment:post': (0.001, 1)})
+    def test_post_scope_shared_by_users(self):
+        """Ведро поста общее для всех пользователей, GET не ограничен."""
+        factory = RequestFactory()
+        request = factory.post('/')
+        request.user = mock.Mock(pk=1)
+        self.assertEqual(view(request, post_id=1).status_code, HTTPStatus.OK)
+        request.user = mock.Mock(pk=2)
+        self.assertEqual(
+            view(request, post_id=1).status_code,
+            HTTPStatus.TOO_MANY_REQUESTS,
+        )
+        self.assertEqual(view(request, post_id=2).status_code, HTTPStatus.OK)
+        self.assertEqual(
+            view(factory.get('/'), post_id=1).status_code,
+            HTTPStatus.OK,
+        )
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, override_settings
+from django.templatetags.static import static
+
+SOURCE_DIR = tempfile.mkdtemp()
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_DIRS=[SOURCE_DIR],
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE_DIR, 'css'))
+        with open(os.path.join(SOURCE_DIR, 'css', 'site.css'), 'w') as file:
+            file.write('body { color: black; }\n' * 100)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SOURCE_DIR, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def test_hashed_url_and_compressed_copy(self):
+        """collectstatic пишет файл с хешем и его сжатую копию."""
+        url = static('css/site.css')
+        self.assertRegex(url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        path = os.path.join(STATIC_ROOT, url[len('/static/'):])
+        self.assertTrue(os.path.isfile(path + '.gz'))
+        self.assertTrue(os.path.isfile(path + '.br'))
+
+    def test_serves_compressed_with_long_cache(self):
+        """Файл с хешем отдаётся сжатым и кешируется на год."""
+        client = Client()
+        response = client.get(
+            static('css/site.css'),
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        response = client.get(
+            static('css/site.css'),
+            HTTP_ACCEPT_ENCODING='gzip, br',
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        response = client.get('/static/css/site.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
@@ -1,7 +1,12 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     return render(
@@ -26,3 +31,19 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=HTTPStatus.FORBIDDEN)
+
+
+def metrics_view(request):
+    """Метрики производительности для Prometheus или в JSON."""
+    if (
+        request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS
+        and not request.user.is_staff
+    ):
+        raise PermissionDenied
+    data = metrics.snapshot()
+    if request.GET.get('format') == 'json':
+        return JsonResponse(data)
+    return HttpResponse(
+        metrics.to_prometheus(data),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Group, Post
+from .search import ranked_post_ids
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +17,12 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
     list_editable = ('group',)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        post_ids = ranked_post_ids(search_term).values('post_id')
+        return queryset.filter(pk__in=post_ids), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
@@ -24,7 +31,7 @@ class GroupAdmin(admin.ModelAdmin):
         'slug',
         'description'
     )
-    search_fields = ('text',)
+    search_fields = ('title', 'description')
     list_filter = ('title',)
     empty_value_display = '-пусто-'
 
@@ -0,0 +1,134 @@
+import hashlib
+import math
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+VERSION_KEY = 'posts:version'
+MODIFIED_KEY = 'posts:modified'
+# Номер последнего отложенного комментария пользователя
+# (posts.comment_buffer): входит в ETag его страниц.
+PENDING_KEY = 'posts:pending:{user_id}'
+
+# Защита от лавины пересчётов: значение обновляет один процесс,
+# взявший блокировку, за EARLY_RECOMPUTE срока жизни до истечения.
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+LOCK_POLL = 0.05
+EARLY_RECOMPUTE = 0.1
+
+
+def get_version():
+    """Текущая версия данных постов, общая для всех фрагментов."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_last_modified():
+    """Время последнего изменения данных постов."""
+    modified = cache.get(MODIFIED_KEY)
+    if modified is None:
+        cache.add(MODIFIED_KEY, timezone.now(), None)
+        modified = cache.get(MODIFIED_KEY)
+    return modified
+
+
+def bump_version():
+    """Делает устаревшими все закешированные фрагменты."""
+    cache.set_many(
+        {VERSION_KEY: uuid4().hex, MODIFIED_KEY: timezone.now()},
+        None,
+    )
+
+
+def get_or_compute(key, compute, timeout=None, backend=cache):
+    """
+    Значение из кеша или результат compute(). Пока один процесс
+    пересчитывает значение, остальные отдают прежнее, а если его нет,
+    ждут до LOCK_WAIT секунд и только потом считают сами.
+    """
+    lock_key = f'{key}:lock'
+    entry = backend.get(key)
+    if entry is not None:
+        value, refresh_at = entry
+        if time.time() < refresh_at or not backend.add(
+            lock_key, 1, LOCK_TIMEOUT,
+        ):
+            return value
+    else:
+        deadline = time.time() + LOCK_WAIT
+        while not backend.add(lock_key, 1, LOCK_TIMEOUT):
+            if time.time() >= deadline:
+                return compute()
+            time.sleep(LOCK_POLL)
+            entry = backend.get(key)
+            if entry is not None:
+                return entry[0]
+    try:
+        value = compute()
+        if timeout is None:
+            refresh_at = math.inf
+        else:
+            refresh_at = time.time() + timeout * (1 - EARLY_RECOMPUTE)
+        backend.set(key, (value, refresh_at), timeout)
+    finally:
+        backend.delete(lock_key)
+    return value
+
+
+def fragment_key(request, *parts):
+    """
+    Ключ фрагмента ленты: версия данных, курсор страницы,
+    вариант для гостя или пользователя и объект ленты.
+    """
+    return ':'.join((
+        get_version(),
+        request.GET.get('after', ''),
+        request.GET.get('before', ''),
+        str(request.user.is_authenticated),
+        *(str(part) for part in parts),
+    ))
+
+
+def pending_key(user_id):
+    return PENDING_KEY.format(user_id=user_id)
+
+
+def pending_number(user):
+    """Номер последнего отложенного комментария, пока буфер включён."""
+    if settings.COMMENT_BUFFER_SECONDS <= 0 or not user.is_authenticated:
+        return 0
+    return cache.get(pending_key(user.pk), 0)
+
+
+def page_etag(request, *args, **kwargs):
+    """
+    Валидатор страницы без запроса к данным: версия, адрес
+    с параметрами, пользователь, его отложенные комментарии
+    и CSRF-cookie для форм на странице.
+    """
+    key = ':'.join((
+        get_version(),
+        request.get_full_path(),
+        str(request.user.pk),
+        str(pending_number(request.user)),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def page_last_modified(request, *args, **kwargs):
+    return get_last_modified()
+
+
+conditional_page = condition(
+    etag_func=page_etag,
+    last_modified_func=page_last_modified,
+)
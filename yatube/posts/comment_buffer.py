@@ -0,0 +1,152 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, connection, transaction
+
+from .cache import bump_version, pending_key
+from .counters import change_comments_counter
+from .models import Comment
+
+logger = logging.getLogger(__name__)
+
+COPY_KEY = 'posts:pending:{user_id}:{number}'
+PENDING_TIMEOUT = 60
+
+_buffer = []
+_timer = None
+_lock = threading.Lock()
+
+
+def is_enabled():
+    return settings.COMMENT_BUFFER_SECONDS > 0
+
+
+def copy_key(user_id, number):
+    return COPY_KEY.format(user_id=user_id, number=number)
+
+
+def _schedule():
+    """Запускает таймер сброса; вызывается под _lock."""
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(settings.COMMENT_BUFFER_SECONDS, run)
+        _timer.daemon = True
+        _timer.start()
+
+
+def add(comment):
+    """
+    Откладывает сохранение комментария до сброса буфера. Копия
+    лежит в кеше под своим номером, пока комментарий не записан,
+    чтобы автор видел его сразу, с какого бы процесса ни пришёл
+    следующий запрос. Номер выдаёт атомарный incr, поэтому быстрые
+    отправки не затирают друг друга, а смена номера меняет ETag
+    страниц автора — версия фрагментов остаётся до сброса.
+    """
+    counter = pending_key(comment.author_id)
+    cache.add(counter, 0, PENDING_TIMEOUT)
+    number = cache.incr(counter)
+    cache.touch(counter, PENDING_TIMEOUT)
+    comment.copy_key = copy_key(comment.author_id, number)
+    cache.set(
+        comment.copy_key,
+        {'post': comment.post_id, 'text': comment.text},
+        PENDING_TIMEOUT,
+    )
+    with _lock:
+        _buffer.append(comment)
+        _schedule()
+
+
+def pending(post, user):
+    """Ещё не записанные комментарии пользователя к посту."""
+    if not user.is_authenticated:
+        return []
+    keys = [
+        copy_key(user.pk, number)
+        for number in range(1, cache.get(pending_key(user.pk), 0) + 1)
+    ]
+    copies = cache.get_many(keys)
+    return [
+        Comment(post=post, author=user, text=copies[key]['text'])
+        for key in keys
+        if key in copies and copies[key]['post'] == post.pk
+    ]
+
+
+def _count(comments):
+    posts = Counter(comment.post_id for comment in comments)
+    for post_id, count in posts.items():
+        change_comments_counter(post_id, count)
+
+
+def save(comments):
+    """
+    Записывает комментарии одной транзакцией. Если пачка не проходит
+    проверку целостности (пост удалили, пока комментарий ждал),
+    комментарии пишутся по одному и пропускаются только ошибочные.
+    """
+    try:
+        with transaction.atomic():
+            Comment.objects.bulk_create(comments)
+            _count(comments)
+        return len(comments)
+    except IntegrityError:
+        pass
+    saved = 0
+    for comment in comments:
+        try:
+            with transaction.atomic():
+                Comment.objects.bulk_create([comment])
+                _count([comment])
+        except IntegrityError:
+            logger.warning(
+                'Комментарий к посту %s не сохранён', comment.post_id,
+            )
+        else:
+            saved += 1
+    return saved
+
+
+def flush():
+    """
+    Записывает накопленные комментарии. bulk_create не шлёт post_save,
+    поэтому счётчики и версия фрагментов обновляются здесь. Если БД
+    недоступна, пачка возвращается в буфер до следующего сброса.
+    """
+    global _timer
+    with _lock:
+        comments = _buffer[:]
+        _buffer.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not comments:
+        return 0
+    try:
+        saved = save(comments)
+    except DatabaseError:
+        with _lock:
+            _buffer[:0] = comments
+            _schedule()
+        raise
+    cache.delete_many([comment.copy_key for comment in comments])
+    bump_version()
+    return saved
+
+
+def run():
+    """Сброс по таймеру вне запроса; соединение с БД закрывается."""
+    try:
+        flush()
+    except Exception:
+        logger.exception('Не удалось сохранить комментарии из буфера')
+    finally:
+        connection.close()
+
+
+atexit.register(flush)
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, UserCounter
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+def change_user_counter(user_id, field, delta):
+    """
+    Атомарно изменяет счётчик пользователя. Строка счётчиков создаётся
+    только при увеличении: при удалении пользователя её уже нет.
+    """
+    counters = UserCounter.objects.filter(user_id=user_id)
+    value = Greatest(F(field) + delta, 0)
+    if not counters.update(**{field: value}) and delta > 0:
+        UserCounter.objects.get_or_create(user_id=user_id)
+        counters.update(**{field: value})
+
+
+def change_comments_counter(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, 0),
+    )
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount():
+    """Пересчитывает все счётчики по данным постов и подписок."""
+    with transaction.atomic():
+        UserCounter.objects.bulk_create(
+            (
+                UserCounter(user_id=user_id)
+                for user_id in User.objects.filter(
+                    counters__isnull=True,
+                ).values_list('id', flat=True).iterator()
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        UserCounter.objects.update(
+            posts_count=_count(Post.objects.all(), 'author'),
+            followers_count=_count(Follow.objects.all(), 'author'),
+            following_count=_count(Follow.objects.all(), 'user'),
+        )
+        Post.objects.update(
+            comments_count=_count(Comment.objects.all(), 'post'),
+        )
+
+
+def recount_follows(user_ids):
+    """
+    Пересчитывает счётчики подписок только у user_ids: после массовой
+    записи подписок, которая идёт в обход сигналов.
+    """
+    user_ids = sorted(set(user_ids))
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+        with transaction.atomic():
+            UserCounter.objects.bulk_create(
+                (UserCounter(user_id=user_id) for user_id in batch),
+                ignore_conflicts=True,
+            )
+            UserCounter.objects.filter(user_id__in=batch).update(
+                followers_count=_count(Follow.objects.all(), 'author'),
+                following_count=_count(Follow.objects.all(), 'user'),
+            )
@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Follow, Post, Timeline, UserCounter
+from .paginator import CursorPaginator
+
+# Авторы, у которых подписчиков не меньше FANOUT_LIMIT, не рассылают
+# посты по лентам: их посты подмешиваются в ленту при чтении.
+FANOUT_LIMIT = 10000
+# Новая подписка получает в ленту только BACKFILL_SIZE последних постов
+# автора: более старые в ленте подписок не показываются, их видно
+# в профиле автора.
+BACKFILL_SIZE = 500
+BATCH_SIZE = 1000
+FEED_ORDERING = ('-pub_date', '-post_id')
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    popular = UserCounter.objects.filter(
+        user_id=post.author_id,
+        followers_count__gte=FANOUT_LIMIT,
+    )
+    if popular.exists():
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)[:FANOUT_LIMIT]
+    )
+    if len(follower_ids) >= FANOUT_LIMIT:
+        return
+    with transaction.atomic():
+        Timeline.objects.bulk_create(
+            (
+                Timeline(
+                    user_id=user_id,
+                    post_id=post.id,
+                    author_id=post.author_id,
+                    pub_date=post.pub_date,
+                )
+                for user_id in follower_ids
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        Post.objects.filter(pk=post.pk).update(fanned_out=True)
+    post.fanned_out = True
+
+
+def backfill(user_id, author_id):
+    """
+    Переносит в ленту последние BACKFILL_SIZE разосланных постов
+    нового автора.
+    """
+    backfill_many([(user_id, author_id)])
+
+
+def backfill_many(pairs):
+    """
+    backfill для многих подписок (user_id, author_id) сразу: посты
+    каждого автора читаются один раз и раскладываются по лентам всех
+    его новых подписчиков.
+    """
+    followers = defaultdict(list)
+    for user_id, author_id in pairs:
+        followers[author_id].append(user_id)
+    for author_id, user_ids in followers.items():
+        posts = list(
+            Post.objects.filter(author_id=author_id, fanned_out=True)
+            .order_by('-pub_date')
+            .values_list('id', 'pub_date')[:BACKFILL_SIZE]
+        )
+        if not posts:
+            continue
+        Timeline.objects.bulk_create(
+            (
+                Timeline(
+                    user_id=user_id,
+                    post_id=post_id,
+                    author_id=author_id,
+                    pub_date=pub_date,
+                )
+                for user_id in user_ids
+                for post_id, pub_date in posts
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def fan_out_pending():
+    """
+    Разносит по лентам посты, записанные в обход сигналов: массовая
+    загрузка или посты, созданные до появления лент (команда
+    fan_out_feeds). Подписки на их авторов читаются пачками авторов,
+    и ленты дополняются, как при новой подписке, — по запросу
+    постов на автора, а не на каждую пару подписчик–автор.
+    Посты популярных авторов остаются на чтении.
+    """
+    popular = UserCounter.objects.filter(
+        followers_count__gte=FANOUT_LIMIT,
+    ).values('user_id')
+    pending = Post.objects.filter(fanned_out=False).exclude(
+        author_id__in=popular,
+    )
+    author_ids = list(
+        pending.order_by().values_list('author_id', flat=True).distinct()
+    )
+    pending.update(fanned_out=True)
+    for start in range(0, len(author_ids), BATCH_SIZE):
+        backfill_many(
+            Follow.objects.filter(
+                author_id__in=author_ids[start:start + BATCH_SIZE],
+            ).values_list('user_id', 'author_id').iterator()
+        )
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты посты автора, от которого отписались."""
+    trim_many([(user_id, author_id)])
+
+
+def trim_many(pairs):
+    """trim для многих отписок: один запрос на пользователя."""
+    authors = defaultdict(list)
+    for user_id, author_id in pairs:
+        authors[user_id].append(author_id)
+    for user_id, author_ids in authors.items():
+        Timeline.objects.filter(
+            user_id=user_id,
+            author_id__in=author_ids,
+        ).delete()
+
+
+def feed_sources(user):
+    """
+    Запросы ленты подписок: готовые записи Timeline и посты авторов,
+    которые не рассылаются при записи.
+    """
+    entries = Timeline.objects.filter(user=user).select_related(
+        'post__author',
+        'post__group',
+    ).order_by(*FEED_ORDERING)
+    pulled = Post.objects.filter(
+        author_id__in=Follow.objects.filter(user=user).values('author_id'),
+        fanned_out=False,
+    ).select_related('author', 'group').annotate(post_id=F('id'))
+    return [entries, pulled]
+
+
+def get_feed_page(user, params, per_page):
+    """Страница ленты подписок, слитая из обоих источников."""
+    paginator = CursorPaginator(feed_sources(user), per_page, FEED_ORDERING)
+    page = paginator.cursor_page(params.get('after'), params.get('before'))
+    page.object_list = [
+        row.post if isinstance(row, Timeline) else row
+        for row in page.object_list
+    ]
+    return page
@@ -0,0 +1,158 @@
+import threading
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import counters, feed
+from .cache import bump_version, get_or_compute
+from .models import Follow
+
+FOLLOWING_KEY = 'posts:following:{user_id}'
+FOLLOWING_TIMEOUT = 60 * 60
+BATCH_SIZE = 1000
+
+_state = threading.local()
+
+
+def following_key(user_id):
+    return FOLLOWING_KEY.format(user_id=user_id)
+
+
+def load(user_id):
+    """Отсортированный компактный массив id авторов из БД."""
+    return array('q', sorted(
+        Follow.objects.filter(user_id=user_id)
+        .values_list('author_id', flat=True)
+    ))
+
+
+def following_ids(user):
+    """
+    Множество id авторов, на которых подписан пользователь. Хранится
+    в кеше массивом и читается один раз за запрос, поэтому проверка
+    «подписан ли я на X» не обращается ни к кешу, ни к БД.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    if not hasattr(user, '_following_ids'):
+        user._following_ids = frozenset(get_or_compute(
+            following_key(user.pk),
+            lambda: load(user.pk),
+            FOLLOWING_TIMEOUT,
+        ))
+    return user._following_ids
+
+
+def followed_authors(posts, user):
+    """
+    Id авторов постов страницы, на которых подписан пользователь,
+    через запятую. Часть ключа фрагмента ленты: фрагмент с отметками
+    «вы подписаны» общий у всех, кто подписан на тех же авторов
+    страницы.
+    """
+    authors = {post.author_id for post in posts} & following_ids(user)
+    return ','.join(str(author_id) for author_id in sorted(authors))
+
+
+def invalidate(user_id):
+    cache.delete(following_key(user_id))
+
+
+@contextmanager
+def bulk():
+    """
+    Внутри блока сигналы подписок не обновляют счётчики, ленты и кеш
+    по строке: это делает массовая операция одним проходом.
+    """
+    _state.bulk = True
+    try:
+        yield
+    finally:
+        _state.bulk = False
+
+
+def in_bulk():
+    return getattr(_state, 'bulk', False)
+
+
+def _batches(pairs, batch_size):
+    pairs = sorted(set(pairs))
+    for start in range(0, len(pairs), batch_size):
+        yield pairs[start:start + batch_size]
+
+
+def _existing(batch):
+    """Какие из пар (user_id, author_id) пачки уже есть в БД."""
+    rows = Follow.objects.filter(
+        user_id__in={user_id for user_id, _ in batch},
+        author_id__in={author_id for _, author_id in batch},
+    ).values_list('user_id', 'author_id')
+    return set(rows) & set(batch)
+
+
+def _finish(pairs):
+    """Счётчики, кеш подписок и фрагментов — одним проходом на все пары."""
+    counters.recount_follows(
+        user_id for pair in pairs for user_id in pair
+    )
+    cache.delete_many([following_key(user_id) for user_id, _ in pairs])
+    bump_version()
+
+
+def bulk_follow(pairs, batch_size=BATCH_SIZE):
+    """
+    Подписки по парам (user_id, author_id) пачками bulk_create, каждая
+    пачка в своей транзакции. Подписки на себя и повторы отбрасываются
+    в памяти. bulk_create не шлёт сигналов, поэтому ленты и счётчики
+    обновляются после записи сразу для всех пар. Возвращает число
+    новых подписок.
+    """
+    created = []
+    for batch in _batches(
+        ((user_id, author_id) for user_id, author_id in pairs
+         if user_id != author_id),
+        batch_size,
+    ):
+        with transaction.atomic():
+            existing = _existing(batch)
+            new = [pair for pair in batch if pair not in existing]
+            Follow.objects.bulk_create(
+                (
+                    Follow(user_id=user_id, author_id=author_id)
+                    for user_id, author_id in new
+                ),
+                ignore_conflicts=True,
+            )
+        created.extend(new)
+    if created:
+        feed.backfill_many(created)
+        _finish(created)
+    return len(created)
+
+
+def bulk_unfollow(pairs, batch_size=BATCH_SIZE):
+    """
+    Отписки по парам (user_id, author_id): одно удаление на пользователя
+    в пачке; сигналы по строкам пропускают свою работу, ленты
+    и счётчики обновляются после для всех пар. Возвращает число
+    удалённых подписок.
+    """
+    deleted = []
+    for batch in _batches(pairs, batch_size):
+        authors = defaultdict(list)
+        for user_id, author_id in batch:
+            authors[user_id].append(author_id)
+        with transaction.atomic(), bulk():
+            deleted.extend(_existing(batch))
+            for user_id, author_ids in authors.items():
+                Follow.objects.filter(
+                    user_id=user_id,
+                    author_id__in=author_ids,
+                ).delete()
+    if deleted:
+        feed.trim_many(deleted)
+        _finish(deleted)
+    return len(deleted)
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import ingest
 from .models import Comment, Post
 
 
@@ -12,6 +14,12 @@ class PostForm(forms.ModelForm):
             'group': forms.Select(attrs={'class': 'form-control'})
         }
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return ingest(image, Post._meta.get_field('image').storage)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,77 @@
+import hashlib
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+UPLOAD_TO = 'posts/'
+MAX_EDGE = 1920
+MAX_SOURCE_PIXELS = 50_000_000
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+
+def content_hash(file):
+    """SHA-256 загруженного файла, читается по частям."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def output_format():
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'WEBP':
+        if image.mode not in ('RGB', 'RGBA'):
+            alpha = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if alpha else 'RGB')
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        if image.mode != 'RGB':
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        image.save(
+            buffer,
+            'JPEG',
+            quality=JPEG_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+    return buffer.getvalue()
+
+
+def ingest(file, storage):
+    """
+    Готовит загруженную картинку к хранению: проверяет размеры,
+    уменьшает до MAX_EDGE по длинной стороне, убирает EXIF и
+    перекодирует в WebP (или JPEG без поддержки WebP). Имя файла —
+    хеш исходного содержимого, так что одинаковые загрузки хранятся
+    один раз: для уже сохранённой возвращается её имя, иначе
+    ContentFile для сохранения полем.
+    """
+    image_format, extension = output_format()
+    name = f'{content_hash(file)}.{extension}'
+    if storage.exists(UPLOAD_TO + name):
+        return UPLOAD_TO + name
+    try:
+        image = Image.open(file)
+        width, height = image.size
+    except (OSError, SyntaxError):
+        raise ValidationError('Не удалось прочитать изображение.')
+    if width * height > MAX_SOURCE_PIXELS:
+        raise ValidationError(
+            'Изображение слишком большое: не более %(limit)s Мпикс.',
+            params={'limit': MAX_SOURCE_PIXELS // 1_000_000},
+        )
+    # Для JPEG декодер сразу уменьшает картинку кратно 1/2..1/8.
+    image.draft('RGB', (MAX_EDGE, MAX_EDGE))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((MAX_EDGE, MAX_EDGE), Image.LANCZOS)
+    return ContentFile(encode(image, image_format), name=name)
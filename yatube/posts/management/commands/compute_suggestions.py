@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import BATCH_SIZE, TOP_K, compute
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «на кого подписаться» по графу '
+        'подписок: друзья друзей и совместные подписки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        total = compute(options['top_k'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендаций записано: {total}'
+        ))
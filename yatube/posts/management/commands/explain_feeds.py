@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.feed import FEED_ORDERING, feed_sources
+from posts.models import Group, Post
+from posts.paginator import CURSOR_ORDERING, CursorPaginator
+from posts.views import COMMENT_ORDERING, COMMENTS_PER_PAGE, POSTS_PER_PAGE
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает EXPLAIN QUERY PLAN основных запросов представлений: '
+        'первой страницы и страницы за курсором.'
+    )
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by('id').first() or User(id=0)
+        group = Group.objects.order_by('id').first() or Group(id=0)
+        post = Post.objects.order_by('id').first() or Post(id=0)
+        entries, pulled = feed_sources(user)
+        sources = {
+            'posts:index': (
+                Post.objects.order_by(*CURSOR_ORDERING),
+                CURSOR_ORDERING,
+            ),
+            'posts:group_list': (
+                Post.objects.filter(group=group).order_by(*CURSOR_ORDERING),
+                CURSOR_ORDERING,
+            ),
+            'posts:profile': (
+                Post.objects.filter(author=user).order_by(*CURSOR_ORDERING),
+                CURSOR_ORDERING,
+            ),
+            'posts:follow_index (timeline)': (
+                entries.order_by(*FEED_ORDERING),
+                FEED_ORDERING,
+            ),
+            'posts:follow_index (pulled)': (
+                pulled.order_by(*FEED_ORDERING),
+                FEED_ORDERING,
+            ),
+        }
+        key = [post.pub_date or timezone.now(), post.id]
+        for name, (queryset, ordering) in sources.items():
+            paginator = CursorPaginator(queryset, POSTS_PER_PAGE, ordering)
+            self.explain(name, paginator.page_queries())
+            self.explain(f'{name} (after)', paginator.page_queries(key))
+        comments = CursorPaginator(
+            post.comments.select_related('author'),
+            COMMENTS_PER_PAGE,
+            COMMENT_ORDERING,
+        )
+        self.explain(
+            'posts:post_detail (comments after)',
+            comments.page_queries([post.pub_date or timezone.now(), 0]),
+        )
+
+    def explain(self, name, querysets):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        for queryset in querysets:
+            self.stdout.write(queryset.explain())
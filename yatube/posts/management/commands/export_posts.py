@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import BATCH_SIZE, export_records, to_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии и подписки в NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл выгрузки, по умолчанию stdout.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            self.write(self.stdout, options['chunk_size'])
+            return
+        with open(options['path'], 'w', encoding='utf-8') as file:
+            self.write(file, options['chunk_size'])
+
+    @staticmethod
+    def write(file, chunk_size):
+        for record in export_records(chunk_size):
+            file.write(to_ndjson(record) + '\n')
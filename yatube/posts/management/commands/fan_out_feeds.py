@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import cache
+from posts.feed import fan_out_pending
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Разносит по лентам подписок ещё не разосланные посты и дополняет '
+        'ленты существующих подписок. Запускается один раз после миграции '
+        '0004_timeline: посты, созданные раньше, иначе остаются на чтении '
+        'при каждом открытии ленты.'
+    )
+
+    def handle(self, *args, **options):
+        pending = Post.objects.filter(fanned_out=False).count()
+        fan_out_pending()
+        cache.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов к рассылке: {pending}, '
+            f'осталось на чтении (популярные авторы): '
+            f'{Post.objects.filter(fanned_out=False).count()}'
+        ))
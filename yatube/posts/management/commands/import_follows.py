@@ -0,0 +1,80 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.following import BATCH_SIZE, bulk_follow, bulk_unfollow
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает граф подписок: строки NDJSON {"user": ..., "author": ...} '
+        'с именами пользователей. Подписки пишутся пачками, ленты '
+        'и счётчики обновляются после загрузки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл NDJSON, по умолчанию stdin.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--unfollow',
+            action='store_true',
+            help='Удалить перечисленные подписки вместо создания.',
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            records = list(self.read(sys.stdin))
+        else:
+            with open(options['path'], encoding='utf-8') as file:
+                records = list(self.read(file))
+        usernames = sorted({
+            username
+            for record in records
+            for username in (record['user'], record['author'])
+        })
+        users = {}
+        for start in range(0, len(usernames), options['batch_size']):
+            users.update(User.objects.filter(
+                username__in=usernames[start:start + options['batch_size']],
+            ).values_list('username', 'id'))
+        pairs = [
+            (users[record['user']], users[record['author']])
+            for record in records
+            if record['user'] in users and record['author'] in users
+        ]
+        write = bulk_unfollow if options['unfollow'] else bulk_follow
+        count = write(pairs, options['batch_size'])
+        action = 'удалено' if options['unfollow'] else 'создано'
+        self.stdout.write(self.style.SUCCESS(
+            f'Строк: {len(records)}, пропущено с неизвестными '
+            f'пользователями: {len(records) - len(pairs)}, '
+            f'{action} подписок: {count}'
+        ))
+
+    @staticmethod
+    def read(file):
+        """Записи файла; строка без имён user и author — ошибка команды."""
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                raise CommandError(f'Строка {number}: {error}')
+            if not isinstance(record, dict) or not all(
+                isinstance(record.get(field), str)
+                for field in ('user', 'author')
+            ):
+                raise CommandError(
+                    f'Строка {number}: нужны строковые поля user и author.'
+                )
+            yield record
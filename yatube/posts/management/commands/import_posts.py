@@ -0,0 +1,44 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import BATCH_SIZE, ImportConflict, Importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_posts пачками и пересчитывает '
+        'счётчики, поисковый индекс и ленты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл NDJSON, по умолчанию stdin.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        importer = Importer(options['batch_size'])
+        try:
+            if options['path'] == '-':
+                processed = importer.load(self.read(sys.stdin))
+            else:
+                with open(options['path'], encoding='utf-8') as file:
+                    processed = importer.load(self.read(file))
+        except ImportConflict as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            'Обработано записей: ' + ', '.join(
+                f'{model} {count}' for model, count in processed.items()
+            )
+        ))
+
+    @staticmethod
+    def read(file):
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Параллельно создаёт миниатюры для всех изображений постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Число потоков генерации.',
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='')
+            .values_list('image', flat=True)
+            .distinct()
+            .iterator()
+        )
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            done = sum(1 for _ in executor.map(thumbnails.run, names))
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано изображений: {done}.')
+        )
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:14
+#
+# Частичный индекс по fanned_out = 0 SQLite без статистики ANALYZE
+# не выбирал: запрос ленты читал все посты авторов по
+# post_author_date_idx. В обычном индексе fanned_out стоит первым.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_suggestion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_pulled_author_idx',
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['fanned_out', 'author', '-pub_date', '-id'], name='post_fanned_author_idx'),
+        ),
+    ]
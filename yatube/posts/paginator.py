@@ -0,0 +1,196 @@
+import json
+from heapq import merge
+from itertools import islice
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+CURSOR_ORDERING = ('-pub_date', '-id')
+
+
+class CursorPaginator(Paginator):
+    """
+    Пагинатор по ключу сортировки вместо OFFSET.
+
+    Страница выбирается непрозрачными курсорами `after`/`before`,
+    поэтому стоимость запроса не зависит от глубины страницы,
+    а COUNT(*) не выполняется. `object_list` может быть запросом
+    или списком запросов с одинаковой сортировкой: их строки
+    сливаются в одну ленту. Запросы должны быть упорядочены.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, ordering=CURSOR_ORDERING):
+        if isinstance(object_list, (list, tuple)):
+            self.sources = list(object_list)
+        else:
+            self.sources = [object_list]
+        for source in self.sources:
+            if not source.ordered:
+                raise ValueError(
+                    f'CursorPaginator получил неупорядоченный запрос '
+                    f'{source.model.__name__}: задайте order_by() '
+                    f'по полям курсора.'
+                )
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+        self.descending = ordering[0].startswith('-')
+        self.has_previous_page = False
+        self.has_next_page = False
+        super().__init__(object_list, per_page)
+
+    @property
+    def count(self):
+        return sum(source.count() for source in self.sources)
+
+    @property
+    def num_pages(self):
+        """Число страниц в окне вокруг текущей, без подсчёта строк."""
+        return 1 + self.has_previous_page + self.has_next_page
+
+    def encode_cursor(self, obj):
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in self._key(obj)
+        ]
+        return urlsafe_base64_encode(json.dumps(values).encode())
+
+    def decode_cursor(self, cursor):
+        """Возвращает значения ключа или None для неверного курсора."""
+        if not cursor:
+            return None
+        try:
+            values = json.loads(urlsafe_base64_decode(cursor).decode())
+        except ValueError:
+            return None
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            return None
+        model = self.sources[0].model
+        try:
+            return [
+                self._to_python(model, name, value)
+                for name, value in zip(self.fields, values)
+            ]
+        except ValidationError:
+            return None
+
+    def cursor_page(self, after=None, before=None):
+        """Возвращает страницу после курсора `after` или перед `before`."""
+        after_key = self.decode_cursor(after)
+        before_key = None if after_key else self.decode_cursor(before)
+        if before_key is not None:
+            rows = self._fetch(before_key, forward=False)
+            self.has_previous_page = len(rows) > self.per_page
+            if self.has_previous_page:
+                self.has_next_page = True
+                rows = rows[:self.per_page][::-1]
+            else:
+                rows = self._fetch(None, forward=True)
+                self.has_next_page = len(rows) > self.per_page
+                rows = rows[:self.per_page]
+        else:
+            rows = self._fetch(after_key, forward=True)
+            self.has_previous_page = after_key is not None
+            self.has_next_page = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+        page = self._get_page(rows, 1 + self.has_previous_page, self)
+        page.next_cursor = ''
+        page.previous_cursor = ''
+        if self.has_next_page:
+            page.next_cursor = self.encode_cursor(rows[-1])
+        if self.has_previous_page and rows:
+            page.previous_cursor = self.encode_cursor(rows[0])
+        return page
+
+    def page_cursor(self, number):
+        """
+        Курсор `after`, с которого начинается страница `number` при
+        нумерации по OFFSET, — для старых ссылок `?page=N`. Пустая
+        строка для первой страницы, None — если такой страницы нет.
+        """
+        if number == 1:
+            return ''
+        offset = (number - 1) * self.per_page - 1
+        sources = list(self._ordered(None, True))
+        if len(sources) == 1:
+            rows = list(sources[0][offset:offset + 1])
+        else:
+            rows = list(islice(self.stream(), offset, offset + 1))
+        if not rows:
+            return None
+        return self.encode_cursor(rows[0])
+
+    def stream(self, after=None, chunk_size=2000):
+        """
+        Все строки после курсора `after` без ограничения по числу.
+        Запросы читаются чанками, поэтому память не зависит
+        от размера таблицы.
+        """
+        rows = [
+            queryset.iterator(chunk_size=chunk_size)
+            for queryset in self._ordered(self.decode_cursor(after), True)
+        ]
+        if len(rows) == 1:
+            return rows[0]
+        return merge(*rows, key=self._key, reverse=self.descending)
+
+    def _key(self, obj):
+        return tuple(getattr(obj, name) for name in self.fields)
+
+    def _ordered(self, key, forward):
+        if forward:
+            ordering = self.ordering
+        else:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in self.ordering
+            ]
+        for queryset in self.sources:
+            if key is not None:
+                queryset = queryset.filter(self._seek(key, forward))
+            yield queryset.order_by(*ordering)
+
+    def page_queries(self, key=None, forward=True):
+        """
+        Запросы, которыми читается страница за ключом `key`, — с тем же
+        условием курсора и LIMIT, например для EXPLAIN.
+        """
+        limit = self.per_page + 1
+        return [queryset[:limit] for queryset in self._ordered(key, forward)]
+
+    def _fetch(self, key, forward):
+        limit = self.per_page + 1
+        rows = self.page_queries(key, forward)
+        if len(rows) == 1:
+            return list(rows[0])
+        reverse = self.descending == forward
+        return list(merge(*rows, key=self._key, reverse=reverse))[:limit]
+
+    def _seek(self, key, forward):
+        """
+        Строки за ключом `key`. Условие (a < X) OR (a = X AND b < Y)
+        SQLite не превращает в диапазон по индексу, поэтому первое поле
+        ограничено ещё и отдельно (a <= X): индекс читается с курсора,
+        а не с начала.
+        """
+        lookup = 'lt' if self.descending == forward else 'gt'
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.fields, key):
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        if len(self.fields) > 1:
+            bound = Q(**{f'{self.fields[0]}__{lookup}e': key[0]})
+            condition = bound & condition
+        return condition
+
+    @staticmethod
+    def _to_python(model, name, value):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
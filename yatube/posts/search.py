@@ -0,0 +1,145 @@
+import math
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from .models import Post, SearchTerm
+
+MAX_TERM_LENGTH = 64
+BATCH_SIZE = 1000
+
+WORD = re.compile(r'\w+')
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'всё', 'где', 'да', 'для',
+    'до', 'если', 'же', 'за', 'и', 'из', 'или', 'к', 'как', 'ко', 'ли',
+    'на', 'над', 'не', 'нет', 'ни', 'но', 'о', 'об', 'от', 'по', 'под',
+    'при', 'про', 'с', 'со', 'так', 'то', 'у', 'что', 'это', 'я',
+))
+
+# Стеммер Портера (Snowball) для русского языка.
+VOWELS = 'аеиоуыэюя'
+RV = re.compile(rf'^(.*?[{VOWELS}])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+DERIVATIONAL_REGION = re.compile(rf'.*[^{VOWELS}]+[{VOWELS}].*ость?$')
+DERIVATIONAL = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+
+def stem(word):
+    """Основа русского слова; прочие слова возвращаются как есть."""
+    match = RV.match(word)
+    if not match:
+        return word
+    prefix, rv = match.groups()
+    stemmed = PERFECTIVE_GERUND.sub('', rv, 1)
+    if stemmed == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        stemmed = ADJECTIVE.sub('', rv, 1)
+        if stemmed != rv:
+            rv = PARTICIPLE.sub('', stemmed, 1)
+        else:
+            stemmed = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if stemmed == rv else stemmed
+    else:
+        rv = stemmed
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    if DERIVATIONAL_REGION.match(rv):
+        rv = DERIVATIONAL.sub('', rv, 1)
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    return prefix + rv
+
+
+def extract_terms(text):
+    """Частоты основ слов текста."""
+    terms = Counter()
+    for word in WORD.findall(text.lower().replace('ё', 'е')):
+        if word in STOP_WORDS:
+            continue
+        terms[stem(word)[:MAX_TERM_LENGTH]] += 1
+    return terms
+
+
+def index_post(post):
+    """Перестраивает строки инвертированного индекса для поста."""
+    with transaction.atomic():
+        SearchTerm.objects.filter(post_id=post.pk).delete()
+        SearchTerm.objects.bulk_create(
+            (
+                SearchTerm(term=term, post_id=post.pk, weight=weight)
+                for term, weight in extract_terms(post.text).items()
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+
+def rebuild_index():
+    """Полностью перестраивает индекс пачками постов."""
+    with transaction.atomic():
+        SearchTerm.objects.all().delete()
+        batch = []
+        for post_id, text in Post.objects.values_list(
+            'id', 'text',
+        ).iterator():
+            batch.extend(
+                SearchTerm(term=term, post_id=post_id, weight=weight)
+                for term, weight in extract_terms(text).items()
+            )
+            if len(batch) >= BATCH_SIZE:
+                SearchTerm.objects.bulk_create(batch)
+                batch = []
+        SearchTerm.objects.bulk_create(batch)
+
+
+def ranked_post_ids(query):
+    """
+    Идентификаторы постов с релевантностью TF-IDF, лучшие первыми.
+    Пустой запрос ничего не находит.
+    """
+    terms = list(extract_terms(query))
+    if not terms:
+        return SearchTerm.objects.none().values('post_id')
+    total = max(Post.objects.count(), 1)
+    frequencies = dict(
+        SearchTerm.objects.filter(term__in=terms)
+        .values_list('term')
+        .annotate(posts=Count('id'))
+    )
+    idf = Case(
+        *(
+            When(term=term, then=Value(math.log(1 + total / posts)))
+            for term, posts in frequencies.items()
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return (
+        SearchTerm.objects.filter(term__in=frequencies)
+        .values('post_id')
+        .annotate(score=Sum(F('weight') * idf, output_field=FloatField()))
+        .order_by('-score', '-post_id')
+    )
@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, feed, following, search
+from .counters import change_comments_counter, change_user_counter
+from .models import Comment, Follow, Group, Post, UserCounter
+
+User = get_user_model()
+
+# Поля пользователя, которые видны в строках лент и комментариев.
+DISPLAYED_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=User)
+def create_user_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserCounter.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_fragments(sender, instance, created, raw=False,
+                              update_fields=None, **kwargs):
+    """Имена авторов есть во фрагментах: их смена сбрасывает версию."""
+    if created or raw:
+        return
+    if update_fields is not None and not (
+        DISPLAYED_USER_FIELDS & set(update_fields)
+    ):
+        return
+    cache.bump_version()
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_user_counter(instance.author_id, 'posts_count', 1)
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    change_user_counter(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_comments_counter(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    change_comments_counter(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_user_counter(instance.user_id, 'following_count', 1)
+        change_user_counter(instance.author_id, 'followers_count', 1)
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    if following.in_bulk():
+        return
+    change_user_counter(instance.user_id, 'following_count', -1)
+    change_user_counter(instance.author_id, 'followers_count', -1)
+    feed.trim(instance.user_id, instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_following(sender, instance, **kwargs):
+    if following.in_bulk():
+        return
+    # После фиксации: иначе параллельный запрос успел бы положить
+    # в кеш прежний набор подписок на FOLLOWING_TIMEOUT.
+    user_id = instance.user_id
+    transaction.on_commit(lambda: following.invalidate(user_id))
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_fragments(sender, **kwargs):
+    if sender is Follow and following.in_bulk():
+        return
+    cache.bump_version()
@@ -0,0 +1,133 @@
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from heapq import nlargest
+
+from django.db import transaction
+
+from .cache import bump_version
+from .following import following_ids
+from .models import Follow, Suggestion
+
+TOP_K = 10
+SHOWN = 5
+BATCH_SIZE = 1000
+# Сколько подписчиков каждого автора смотреть при подсчёте совместных
+# подписок: у популярных авторов их слишком много. Берутся через
+# равный шаг по всему списку, а не первые по id — иначе счёт
+# смещался бы к самым старым аккаунтам.
+COFOLLOW_SAMPLE = 100
+CHUNK_SIZE = 10000
+
+
+class Adjacency:
+    """
+    Списки смежности в сжатом виде: отсортированные ключи, смещения
+    и все соседи подряд, каждое в array('q') — по 8 байт на id.
+    """
+
+    def __init__(self, pairs):
+        self.keys = array('q')
+        self.offsets = array('q')
+        self.values = array('q')
+        for key, value in pairs:
+            if not self.keys or self.keys[-1] != key:
+                self.keys.append(key)
+                self.offsets.append(len(self.values))
+            self.values.append(value)
+        self.offsets.append(len(self.values))
+
+    def __getitem__(self, key):
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return self.values[:0]
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
+
+def spread(values, size):
+    """Не больше size значений через равный шаг по всему массиву."""
+    return values[::math.ceil(len(values) / size) or 1]
+
+
+class FollowGraph:
+    """Граф подписок, загруженный двумя проходами по таблице Follow."""
+
+    def __init__(self):
+        self.following = Adjacency(self.scan('user_id', 'author_id'))
+        self.followers = Adjacency(self.scan('author_id', 'user_id'))
+
+    @staticmethod
+    def scan(*fields):
+        return Follow.objects.order_by(*fields).values_list(
+            *fields,
+        ).iterator(chunk_size=CHUNK_SIZE)
+
+    def suggest(self, user_id, top_k=TOP_K):
+        """
+        Лучшие top_k пар (author_id, score): сколько раз автор встречается
+        среди подписок тех, на кого подписан пользователь (друзья друзей),
+        и среди подписок других подписчиков тех же авторов.
+        """
+        followed = self.following[user_id]
+        scores = Counter()
+        for author_id in followed:
+            scores.update(self.following[author_id])
+            followers = spread(self.followers[author_id], COFOLLOW_SAMPLE)
+            for follower_id in followers:
+                if follower_id != user_id:
+                    scores.update(self.following[follower_id])
+        scores.pop(user_id, None)
+        for author_id in followed:
+            scores.pop(author_id, None)
+        return nlargest(
+            top_k,
+            scores.items(),
+            key=lambda item: (item[1], -item[0]),
+        )
+
+
+def compute(top_k=TOP_K, batch_size=BATCH_SIZE):
+    """
+    Пересчитывает таблицу рекомендаций. Рекомендации пачки пользователей
+    заменяются одной транзакцией, так что страницы всё время видят
+    прежние или новые строки. В конце сбрасывается версия страниц,
+    иначе условный GET профиля отдавал бы 304 со старыми
+    рекомендациями. Возвращает число записанных строк.
+    """
+    graph = FollowGraph()
+    Suggestion.objects.exclude(
+        user_id__in=Follow.objects.values('user_id'),
+    ).delete()
+    user_ids = graph.following.keys
+    total = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = list(user_ids[start:start + batch_size])
+        rows = [
+            Suggestion(user_id=user_id, author_id=author_id, score=score)
+            for user_id in batch
+            for author_id, score in graph.suggest(user_id, top_k)
+        ]
+        with transaction.atomic():
+            Suggestion.objects.filter(user_id__in=batch).delete()
+            Suggestion.objects.bulk_create(rows)
+        total += len(rows)
+    bump_version()
+    return total
+
+
+def suggested_authors(user, exclude=None):
+    """
+    Рекомендованные авторы одним запросом по индексу (user, -score).
+    Подписки, сделанные после пересчёта, отсеиваются по кешу подписок.
+    """
+    if not user.is_authenticated:
+        return []
+    skip = following_ids(user) | {exclude}
+    return [
+        suggestion.author
+        for suggestion in Suggestion.objects.filter(user=user)
+        .select_related('author')
+        .order_by('-score', 'author')[:TOP_K]
+        if suggestion.author_id not in skip
+    ][:SHOWN]
@@ -0,0 +1,63 @@
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Library, TemplateSyntaxError, VariableDoesNotExist
+from django.templatetags import cache as cache_tags
+
+from posts.cache import get_or_compute
+
+register = Library()
+
+
+class FragmentCacheNode(cache_tags.CacheNode):
+    """Фрагмент {% cache %}, который пересчитывает только один процесс."""
+
+    def render(self, context):
+        try:
+            expire_time = self.expire_time_var.resolve(context)
+        except VariableDoesNotExist:
+            raise TemplateSyntaxError(
+                f'"cache" tag got an unknown variable: '
+                f'{self.expire_time_var.var!r}'
+            )
+        if expire_time is not None:
+            try:
+                expire_time = int(expire_time)
+            except (ValueError, TypeError):
+                raise TemplateSyntaxError(
+                    f'"cache" tag got a non-integer timeout value: '
+                    f'{expire_time!r}'
+                )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+            self.get_cache(context),
+        )
+
+    def get_cache(self, context):
+        if not self.cache_name:
+            try:
+                return caches['template_fragments']
+            except InvalidCacheBackendError:
+                return caches['default']
+        cache_name = self.cache_name.resolve(context)
+        try:
+            return caches[cache_name]
+        except InvalidCacheBackendError:
+            raise TemplateSyntaxError(
+                f'Invalid cache name specified for cache tag: {cache_name!r}'
+            )
+
+
+@register.tag('cache')
+def do_cache(parser, token):
+    """{% cache %} с защитой от лавины пересчётов, синтаксис тот же."""
+    node = cache_tags.do_cache(parser, token)
+    return FragmentCacheNode(
+        node.nodelist,
+        node.expire_time_var,
+        node.fragment_name,
+        node.vary_on,
+        node.cache_name,
+    )
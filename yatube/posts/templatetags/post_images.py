@@ -0,0 +1,56 @@
+import logging
+
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+logger = logging.getLogger(__name__)
+
+SIZES = '(max-width: 960px) 100vw, 960px'
+MIME_TYPES = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+
+
+def srcset(images):
+    return ', '.join(f'{image.url} {image.x}w' for image in images)
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(image, prefetched=None):
+    """
+    Картинка поста с вариантами ширин в srcset. Пока миниатюр нет,
+    отдаёт оригинал и ставит генерацию в очередь, не задерживая ответ.
+    `prefetched` — миниатюры всей страницы из thumbnails.prefetch.
+    """
+    if not image:
+        return {}
+    try:
+        if prefetched is None or image.name not in prefetched:
+            prefetched = thumbnails.lookup([image])
+        variants = prefetched[image.name]
+    except Exception:
+        logger.exception('Ошибка чтения миниатюр %s', image)
+        variants = {}
+    if (thumbnails.GEOMETRY, 'JPEG') not in variants:
+        thumbnails.schedule(image.name)
+    by_format = {}
+    for (_, image_format), thumbnail in variants.items():
+        by_format.setdefault(image_format, []).append(thumbnail)
+    fallback = sorted(by_format.pop('JPEG', []), key=lambda image: image.x)
+    if not fallback:
+        return {'src': image.url}
+    main = min(fallback, key=lambda image: abs(image.x - thumbnails.WIDTH))
+    return {
+        'src': main.url,
+        'width': main.x,
+        'height': main.y,
+        'srcset': srcset(fallback),
+        'sizes': SIZES,
+        'sources': [
+            {
+                'type': MIME_TYPES[image_format],
+                'srcset': srcset(sorted(images, key=lambda image: image.x)),
+            }
+            for image_format, images in by_format.items()
+        ],
+    }
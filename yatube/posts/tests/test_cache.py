@@ -0,0 +1,68 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from posts.cache import get_or_compute
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        """Одновременные промахи пересчитывают значение один раз."""
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(1)
+            return 'значение'
+
+        results = []
+        workers = [
+            threading.Thread(
+                target=lambda: results.append(
+                    get_or_compute('key', compute, 60),
+                ),
+            )
+            for _ in range(4)
+        ]
+        workers[0].start()
+        started.wait(1)
+        for worker in workers[1:]:
+            worker.start()
+        release.set()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['значение'] * 4)
+
+    def test_stale_value_served_while_recomputing(self):
+        """Пока значение пересчитывается, остальные получают прежнее."""
+        with mock.patch('posts.cache.EARLY_RECOMPUTE', 1):
+            get_or_compute('key', lambda: 'старое', 60)
+            cache.add('key:lock', 1)
+            self.assertEqual(
+                get_or_compute('key', lambda: 'новое', 60), 'старое',
+            )
+            cache.delete('key:lock')
+            self.assertEqual(
+                get_or_compute('key', lambda: 'новое', 60), 'новое',
+            )
+
+    def test_fragment_tag_renders_once(self):
+        """Тег cache из fragments отдаёт сохранённый фрагмент."""
+        template = Template(
+            '{% load fragments %}{% cache 60 name key %}{{ value }}'
+            '{% endcache %}'
+        )
+        first = template.render(Context({'key': 1, 'value': 'первый'}))
+        second = template.render(Context({'key': 1, 'value': 'второй'}))
+        self.assertEqual(first, 'первый')
+        self.assertEqual(second, 'первый')
@@ -0,0 +1,244 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.models import (Comment, Follow, Group, Post, SearchTerm, Timeline,
+                          UserCounter)
+
+User = get_user_model()
+
+
+class ExplainFeedsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Автор')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(text='Пост', author=cls.user, group=cls.group)
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент используют составные индексы."""
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        output = out.getvalue()
+        for index in (
+            'post_date_idx',
+            'post_group_date_idx',
+            'post_author_date_idx',
+            'timeline_user_date_idx',
+            'post_fanned_author_idx (fanned_out=? AND author_id=?)',
+        ):
+            with self.subTest(index=index):
+                self.assertIn(index, output)
+
+    def test_cursor_pages_search_from_cursor(self):
+        """Страницы за курсором ищут по индексу диапазоном от курсора."""
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        sections = {}
+        plan = []
+        for line in out.getvalue().splitlines():
+            if line[:1].isdigit():
+                plan.append(line)
+            else:
+                plan = sections[line] = []
+        for name, plan in sections.items():
+            if not name.endswith('(after)'):
+                continue
+            with self.subTest(name=name):
+                self.assertIn('pub_date<?', ' '.join(plan))
+                self.assertNotIn('SCAN', ' '.join(plan))
+
+
+class RecountCommandTest(TestCase):
+    def test_recount_repairs_drift(self):
+        """Команда recount восстанавливает испорченные счётчики."""
+        author = User.objects.create_user(username='Автор')
+        reader = User.objects.create_user(username='Читатель')
+        post = Post.objects.create(text='Пост', author=author)
+        Comment.objects.create(post=post, author=reader, text='Да')
+        Follow.objects.create(user=reader, author=author)
+        UserCounter.objects.update(
+            posts_count=7,
+            followers_count=7,
+            following_count=7,
+        )
+        UserCounter.objects.filter(user=reader).delete()
+        Post.objects.update(comments_count=7)
+        call_command('recount', stdout=StringIO())
+        author_counters = UserCounter.objects.get(user=author)
+        reader_counters = UserCounter.objects.get(user=reader)
+        self.assertEqual(author_counters.posts_count, 1)
+        self.assertEqual(author_counters.followers_count, 1)
+        self.assertEqual(author_counters.following_count, 0)
+        self.assertEqual(reader_counters.following_count, 1)
+        self.assertEqual(Post.objects.get().comments_count, 1)
+
+
+class ExportImportCommandTest(TestCase):
+    def test_round_trip(self):
+        """Выгрузка загружается обратно со всеми связями и датами."""
+        author = User.objects.create_user(username='Автор')
+        reader = User.objects.create_user(username='Читатель')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        post = Post.objects.create(
+            text='Рыжие кошки',
+            author=author,
+            group=group,
+        )
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=post.pub_date - timedelta(days=30),
+        )
+        Comment.objects.create(post=post, author=reader, text='Да')
+        Follow.objects.create(user=reader, author=author)
+        expected = Post.objects.values_list(
+            'id', 'text', 'pub_date', 'group__slug',
+        ).get()
+        dump = StringIO()
+        call_command('export_posts', stdout=dump)
+        Group.objects.all().delete()
+        User.objects.all().delete()
+
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as file:
+            file.write(dump.getvalue())
+            file.flush()
+            call_command('import_posts', file.name, stdout=StringIO())
+            call_command('import_posts', file.name, stdout=StringIO())
+
+        self.assertEqual(
+            Post.objects.values_list(
+                'id', 'text', 'pub_date', 'group__slug',
+            ).get(),
+            expected,
+        )
+        self.assertEqual(Comment.objects.get().author.username, 'Читатель')
+        author = User.objects.get(username='Автор')
+        reader = User.objects.get(username='Читатель')
+        self.assertFalse(author.has_usable_password())
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=author).exists()
+        )
+        self.assertEqual(UserCounter.objects.get(user=author).posts_count, 1)
+        self.assertEqual(Post.objects.get().comments_count, 1)
+        self.assertTrue(SearchTerm.objects.filter(post_id=post.pk).exists())
+        self.assertTrue(
+            Timeline.objects.filter(user=reader, post_id=post.pk).exists()
+        )
+
+
+class ImportFollowsCommandTest(TestCase):
+    def import_follows(self, records, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as file:
+            file.write('\n'.join(json.dumps(record) for record in records))
+            file.flush()
+            call_command(
+                'import_follows', file.name, *args, stdout=StringIO(),
+            )
+
+    def test_follow_graph(self):
+        """Граф подписок пишется пачками, ленты и счётчики обновляются."""
+        author = User.objects.create_user(username='Автор')
+        readers = [
+            User.objects.create_user(username=f'Читатель {number}')
+            for number in range(3)
+        ]
+        post = Post.objects.create(text='Пост', author=author)
+        records = [
+            {'user': reader.username, 'author': author.username}
+            for reader in readers
+        ] + [
+            {'user': author.username, 'author': author.username},
+            {'user': readers[0].username, 'author': 'Неизвестный'},
+        ]
+
+        self.import_follows(records * 2, '--batch-size', '2')
+
+        self.assertEqual(
+            set(Follow.objects.values_list('user_id', 'author_id')),
+            {(reader.pk, author.pk) for reader in readers},
+        )
+        self.assertEqual(
+            Timeline.objects.filter(post=post).count(),
+            len(readers),
+        )
+        self.assertEqual(
+            UserCounter.objects.get(user=author).followers_count,
+            len(readers),
+        )
+        self.assertEqual(
+            UserCounter.objects.get(user=readers[0]).following_count, 1,
+        )
+
+        self.import_follows(records[:1], '--unfollow')
+
+        self.assertFalse(
+            Follow.objects.filter(user=readers[0]).exists()
+        )
+        self.assertFalse(Timeline.objects.filter(user=readers[0]).exists())
+        self.assertEqual(
+            UserCounter.objects.get(user=author).followers_count,
+            len(readers) - 1,
+        )
+        self.assertEqual(
+            UserCounter.objects.get(user=readers[0]).following_count, 0,
+        )
+
+    def test_invalid_line_reported(self):
+        """Строка без user или author останавливает загрузку с ошибкой."""
+        with self.assertRaisesMessage(CommandError, 'Строка 2'):
+            self.import_follows([
+                {'user': 'Читатель', 'author': 'Автор'},
+                {'user': 'Читатель'},
+            ])
+
+    def test_import_into_populated_database(self):
+        """Чужой пост с тем же id останавливает загрузку, а не подменяется."""
+        author = User.objects.create_user(username='Автор')
+        post = Post.objects.create(text='Из выгрузки', author=author)
+        Comment.objects.create(post=post, author=author, text='К нему')
+        dump = StringIO()
+        call_command('export_posts', stdout=dump)
+        Post.objects.all().delete()
+        local = Post.objects.create(
+            id=post.pk, text='Местный пост', author=author,
+        )
+
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as file:
+            file.write(dump.getvalue())
+            file.flush()
+            with self.assertRaises(CommandError):
+                call_command('import_posts', file.name, stdout=StringIO())
+
+        self.assertEqual(Post.objects.get().text, 'Местный пост')
+        self.assertFalse(Comment.objects.filter(post=local).exists())
+
+
+class FanOutFeedsCommandTest(TestCase):
+    def test_existing_posts_and_follows_backfilled(self):
+        """Посты и подписки, созданные до лент, попадают в ленты."""
+        author = User.objects.create_user(username='Автор')
+        reader = User.objects.create_user(username='Читатель')
+        post = Post.objects.create(text='Старый пост', author=author)
+        Post.objects.update(fanned_out=False)
+        Follow.objects.bulk_create([Follow(user=reader, author=author)])
+
+        call_command('fan_out_feeds', stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertTrue(post.fanned_out)
+        self.assertTrue(
+            Timeline.objects.filter(user=reader, post=post).exists()
+        )
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post, Timeline
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.reader = User.objects.create_user(username='Читатель')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get_feed(self, **params):
+        response = self.reader_client.get(
+            reverse('posts:follow_index'),
+            params,
+        )
+        return response.context['page_obj']
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков при записи."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        post.refresh_from_db()
+        self.assertTrue(post.fanned_out)
+        self.assertTrue(
+            Timeline.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(list(self.get_feed()), [post])
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        """Подписка дополняет ленту, отписка очищает её."""
+        posts = [
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+            for number in range(3)
+        ]
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(list(self.get_feed()), posts[::-1])
+        follow.delete()
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+        self.assertEqual(list(self.get_feed()), [])
+
+    def test_backfill_limited_to_latest_posts(self):
+        """Новая подписка получает в ленту только BACKFILL_SIZE постов."""
+        posts = [
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+            for number in range(3)
+        ]
+        with mock.patch('posts.feed.BACKFILL_SIZE', 2):
+            Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(list(self.get_feed()), posts[:0:-1])
+
+    @mock.patch('posts.feed.FANOUT_LIMIT', 2)
+    def test_popular_author_is_merged_on_read(self):
+        """Посты популярного автора подмешиваются в ленту при чтении."""
+        other = User.objects.create_user(username='Другой автор')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=other)
+        Follow.objects.create(user=other, author=self.author)
+        first = Post.objects.create(text='Популярный', author=self.author)
+        second = Post.objects.create(text='Обычный', author=other)
+        third = Post.objects.create(text='Ещё популярный', author=self.author)
+        self.assertFalse(Timeline.objects.filter(post=first).exists())
+        self.assertTrue(Timeline.objects.filter(post=second).exists())
+        self.assertEqual(list(self.get_feed()), [third, second, first])
+
+    @mock.patch('posts.views.POSTS_PER_PAGE', 2)
+    def test_merged_feed_pages_by_cursor(self):
+        """Курсор листает слитую ленту без пропусков и повторов."""
+        with mock.patch('posts.feed.FANOUT_LIMIT', 1):
+            Follow.objects.create(user=self.reader, author=self.author)
+            Follow.objects.create(
+                user=User.objects.create_user(username='Второй'),
+                author=self.author,
+            )
+            pulled = [
+                Post.objects.create(text=f'Пост {n}', author=self.author)
+                for n in range(2)
+            ]
+        other = User.objects.create_user(username='Другой автор')
+        Follow.objects.create(user=self.reader, author=other)
+        pushed = [
+            Post.objects.create(text=f'Пост {n}', author=other)
+            for n in range(3)
+        ]
+        first_page = self.get_feed()
+        second_page = self.get_feed(after=first_page.next_cursor)
+        third_page = self.get_feed(after=second_page.next_cursor)
+        self.assertFalse(third_page.has_next())
+        self.assertEqual(
+            list(first_page) + list(second_page) + list(third_page),
+            (pulled + pushed)[::-1],
+        )
@@ -1,13 +1,19 @@
 import shutil
 import tempfile
 from http import HTTPStatus
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.db import OperationalError
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
 from django.urls import reverse
 
+from posts import comment_buffer
+from posts.cache import get_version
 from posts.models import Comment, Group, Post
 
 User = get_user_model()
@@ -78,7 +84,10 @@ class PostsFormsTest(TestCase):
         self.assertEqual(last_post.text, form_data['text'])
         self.assertEqual(last_post.author, self.author)
         self.assertEqual(last_post.group.id, form_data['group'])
-        self.assertEqual(last_post.image.name, 'posts/small.gif')
+        self.assertRegex(
+            last_post.image.name,
+            r'^posts/[0-9a-f]{64}\.(webp|jpg)$',
+        )
 
     def test_authorized_client_create_comment(self):
         """Проверка создания комментария авторизированным пользователем."""
@@ -102,6 +111,59 @@ class PostsFormsTest(TestCase):
             reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
         )
 
+    @override_settings(COMMENT_BUFFER_SECONDS=60)
+    def test_buffered_comments_visible_to_author_until_flush(self):
+        """Отложенный комментарий сразу виден автору и записывается пачкой."""
+        cache.clear()
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.id})
+        detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id},
+        )
+        etag = self.auth_user_comment.get(detail_url)['ETag']
+        version = get_version()
+        comments_count = Comment.objects.count()
+        for number in range(3):
+            response = self.auth_user_comment.post(
+                url,
+                data={'text': f'Отложенный комментарий {number}'},
+                follow=True,
+            )
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        self.assertContains(response, 'Отложенный комментарий 0')
+        self.assertContains(response, 'Отложенный комментарий 2')
+        self.assertEqual(Comment.objects.count(), comments_count)
+        self.assertEqual(get_version(), version)
+        response = self.auth_user_comment.get(
+            detail_url, HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(
+            self.guest_client.get(response.request['PATH_INFO']),
+            'Отложенный комментарий 2',
+        )
+        self.assertEqual(comment_buffer.flush(), 3)
+        self.assertEqual(Comment.objects.count(), comments_count + 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, comments_count + 3)
+        response = self.auth_user_comment.get(response.request['PATH_INFO'])
+        self.assertContains(response, 'Отложенный комментарий 2', count=1)
+
+    @override_settings(RATE_LIMITS={'comment:user': (0.001, 2)})
+    def test_comments_rate_limited(self):
+        """Сверх лимита комментарии не записываются, ответ — 429."""
+        cache.clear()
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.id})
+        comments_count = Comment.objects.count()
+        for _ in range(2):
+            self.auth_user_comment.post(url, data={'text': 'Комментарий'})
+        response = self.auth_user_comment.post(url, data={'text': 'Ещё'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), comments_count + 2)
+
     def test_not_authorized_client_create_comment(self):
         """Проверка создания комментария не авторизированным пользователем."""
         comments_count = Comment.objects.count()
@@ -151,3 +213,43 @@ class PostsFormsTest(TestCase):
 
         edit_post = Post.objects.get(id=self.post.id)
         self.assertEqual(edit_post.group.id, form_data['group'])
+
+
+@override_settings(COMMENT_BUFFER_SECONDS=60)
+class CommentBufferFlushTest(TransactionTestCase):
+    def test_flush_skips_only_broken_comments(self):
+        """Комментарий к удалённому посту не мешает записать остальные."""
+        cache.clear()
+        author = User.objects.create_user(username='Автор')
+        posts = [
+            Post.objects.create(text=f'Пост {number}', author=author)
+            for number in range(2)
+        ]
+        for post in posts:
+            comment_buffer.add(
+                Comment(post=post, author=author, text='Комментарий'),
+            )
+        posts[1].delete()
+        self.assertEqual(comment_buffer.flush(), 1)
+        self.assertEqual(
+            list(Comment.objects.values_list('post', flat=True)),
+            [posts[0].pk],
+        )
+        self.assertEqual(comment_buffer.pending(posts[0], author), [])
+
+    def test_flush_keeps_batch_when_database_fails(self):
+        """Если БД недоступна, пачка остаётся в буфере до следующего сброса."""
+        cache.clear()
+        author = User.objects.create_user(username='Автор')
+        post = Post.objects.create(text='Пост', author=author)
+        comment_buffer.add(
+            Comment(post=post, author=author, text='Комментарий'),
+        )
+        with mock.patch.object(
+            Comment.objects, 'bulk_create', side_effect=OperationalError,
+        ):
+            with self.assertRaises(OperationalError):
+                comment_buffer.flush()
+        self.assertEqual(len(comment_buffer.pending(post, author)), 1)
+        self.assertEqual(comment_buffer.flush(), 1)
+        self.assertEqual(Comment.objects.get().text, 'Комментарий')
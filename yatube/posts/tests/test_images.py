@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.images import MAX_EDGE, ingest
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_upload(size=(4000, 3000), name='photo.jpg'):
+    image = Image.new('RGB', size, (200, 100, 50))
+    exif = Image.Exif()
+    exif[0x010F] = 'Камера'
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageIngestTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_downscaled_and_stripped(self):
+        """Картинка уменьшается до MAX_EDGE и теряет EXIF."""
+        result = ingest(make_upload(), default_storage)
+        image = Image.open(result)
+        self.assertEqual(max(image.size), MAX_EDGE)
+        self.assertEqual(image.size[0] / image.size[1], 4 / 3)
+        self.assertIn(image.format, ('WEBP', 'JPEG'))
+        self.assertFalse(image.getexif())
+
+    @mock.patch('posts.images.MAX_SOURCE_PIXELS', 100)
+    def test_too_many_pixels_rejected(self):
+        """Слишком большая картинка не принимается."""
+        with self.assertRaises(ValidationError):
+            ingest(make_upload(size=(20, 20)), default_storage)
+
+    def test_identical_uploads_stored_once(self):
+        """Одинаковые загрузки ссылаются на один файл."""
+        author = User.objects.create_user(username='Автор')
+        self.client.force_login(author)
+        for number in range(2):
+            self.client.post(
+                reverse('posts:post_create'),
+                {'text': f'Пост {number}', 'image': make_upload()},
+            )
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertEqual(len(default_storage.listdir('posts')[1]), 1)
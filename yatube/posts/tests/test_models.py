@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 from django.test import TestCase
 
-from ..models import MAX_CHARS, Group, Post
+from ..models import MAX_CHARS, Comment, Follow, Group, Post, UserCounter
 
 User = get_user_model()
 
@@ -70,3 +71,71 @@ class GroupModelTest(TestCase):
             with self.subTest(value=value):
                 verbose_name = self.group._meta.get_field(value).verbose_name
                 self.assertEqual(verbose_name, expected)
+
+
+class FollowModelTest(TestCase):
+    def test_follow_is_unique(self):
+        """Повторная подписка на автора запрещена на уровне БД."""
+        user = User.objects.create_user(username='Подписчик')
+        author = User.objects.create_user(username='Автор')
+        Follow.objects.create(user=user, author=author)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=user, author=author)
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.reader = User.objects.create_user(username='Читатель')
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении записей."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        comment = Comment.objects.create(
+            post=post,
+            author=self.reader,
+            text='Комментарий',
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            UserCounter.objects.get(user=self.author).posts_count,
+            1,
+        )
+        self.assertEqual(
+            UserCounter.objects.get(user=self.author).followers_count,
+            1,
+        )
+        self.assertEqual(
+            UserCounter.objects.get(user=self.reader).following_count,
+            1,
+        )
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(
+            UserCounter.objects.get(user=self.author).followers_count,
+            0,
+        )
+        post.delete()
+        self.assertEqual(
+            UserCounter.objects.get(user=self.author).posts_count,
+            0,
+        )
+
+    def test_user_delete_keeps_counters_consistent(self):
+        """Удаление автора с постами не оставляет лишних счётчиков."""
+        Post.objects.create(text='Пост', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.author.delete()
+        self.assertFalse(
+            UserCounter.objects.filter(user_id=self.author.pk).exists()
+        )
+        self.assertEqual(
+            UserCounter.objects.get(user=self.reader).following_count,
+            0,
+        )
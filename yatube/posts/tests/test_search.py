@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, SearchTerm
+from posts.search import extract_terms, ranked_post_ids, stem
+
+User = get_user_model()
+
+
+class StemmerTest(TestCase):
+    def test_inflected_forms_share_stem(self):
+        """Словоформы приводятся к общей основе."""
+        for words in (
+            ('кошка', 'кошки', 'кошкой', 'кошках'),
+            ('бежать', 'бежал', 'бежали'),
+            ('красивый', 'красивая', 'красивыми'),
+        ):
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+    def test_stop_words_are_skipped(self):
+        """Стоп-слова не попадают в индекс."""
+        self.assertEqual(
+            extract_terms('Кот и пёс на улице'),
+            extract_terms('кот пёс улице'),
+        )
+
+
+class SearchIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+
+    def search(self, query):
+        return [row['post_id'] for row in ranked_post_ids(query)]
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.create(text='Рыжие кошки', author=self.author)
+        self.assertEqual(self.search('кошка'), [post.pk])
+        post.text = 'Серые собаки'
+        post.save()
+        self.assertEqual(self.search('кошка'), [])
+        self.assertEqual(self.search('собака'), [post.pk])
+        post.delete()
+        self.assertFalse(SearchTerm.objects.exists())
+
+    def test_ranking(self):
+        """Частые в посте и редкие в корпусе слова поднимают пост выше."""
+        once = Post.objects.create(text='кошка и дом', author=self.author)
+        twice = Post.objects.create(
+            text='кошка, кошки, дом',
+            author=self.author,
+        )
+        rare = Post.objects.create(text='дом и сад', author=self.author)
+        self.assertEqual(self.search('кошки'), [twice.pk, once.pk])
+        self.assertEqual(self.search('сад дом')[0], rare.pk)
+        self.assertEqual(self.search('и'), [])
+
+    def test_reindex_command(self):
+        """Команда reindex_posts восстанавливает индекс."""
+        post = Post.objects.create(text='Рыжие кошки', author=self.author)
+        SearchTerm.objects.all().delete()
+        call_command('reindex_posts', stdout=StringIO())
+        self.assertEqual(self.search('кошка'), [post.pk])
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        Post.objects.bulk_create(
+            Post(text=f'Кошка номер {number}', author=cls.author)
+            for number in range(13)
+        )
+        call_command('reindex_posts', stdout=StringIO())
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_search_paginates_results(self):
+        """Результаты поиска разбиты на страницы."""
+        url = reverse('posts:search')
+        response = self.guest_client.get(url, {'q': 'кошки'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertEqual(response.context['query'], 'кошки')
+        self.assertContains(response, 'q=%D0%BA%D0%BE%D1%88%D0%BA%D0%B8')
+        response = self.guest_client.get(url, {'q': 'кошки', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_empty_query(self):
+        """Пустой запрос ничего не находит."""
+        response = self.guest_client.get(reverse('posts:search'))
+        self.assertEqual(len(response.context['page_obj']), 0)
@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Follow, Suggestion
+from posts.cache import get_version
+from posts.suggestions import FollowGraph, spread
+
+User = get_user_model()
+
+
+class SuggestionsTest(TransactionTestCase):
+    """
+    Кеш подписок сбрасывается после фиксации транзакции, поэтому
+    тест идёт без общей транзакции TestCase.
+    """
+
+    def setUp(self):
+        self.reader, self.friend, self.other, self.popular, self.niche = [
+            User.objects.create_user(username=username)
+            for username in (
+                'Читатель', 'Друг', 'Другой', 'Популярный', 'Нишевый',
+            )
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for user, author in (
+                (self.reader, self.friend),
+                (self.friend, self.popular),
+                (self.friend, self.niche),
+                (self.other, self.friend),
+                (self.other, self.popular),
+            )
+        )
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_scores(self):
+        """Друзья друзей и совместные подписки складываются в счёт."""
+        graph = FollowGraph()
+        self.assertEqual(
+            graph.suggest(self.reader.pk),
+            [(self.popular.pk, 2), (self.niche.pk, 1)],
+        )
+        self.assertEqual(graph.suggest(self.popular.pk), [])
+
+    def test_cofollow_sample_spread(self):
+        """Выборка подписчиков берётся по всему списку, а не с начала."""
+        sample = spread(list(range(1000)), 100)
+        self.assertEqual(len(sample), 100)
+        self.assertEqual(sample[-1], 990)
+        self.assertEqual(spread([1, 2], 100), [1, 2])
+
+    def test_command_and_views(self):
+        """Команда пишет рекомендации, страницы показывают их из таблицы."""
+        Suggestion.objects.create(
+            user=self.popular, author=self.reader, score=1,
+        )
+        version = get_version()
+        call_command('compute_suggestions', stdout=StringIO())
+        self.assertNotEqual(get_version(), version)
+        self.assertFalse(Suggestion.objects.filter(user=self.popular))
+        self.assertEqual(
+            list(
+                Suggestion.objects.filter(user=self.reader)
+                .order_by('-score')
+                .values_list('author', 'score')
+            ),
+            [(self.popular.pk, 2), (self.niche.pk, 1)],
+        )
+        for url, expected in (
+            (reverse('posts:follow_index'), [self.popular, self.niche]),
+            (
+                reverse('posts:profile', args=[self.popular.username]),
+                [self.niche],
+            ),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.context['suggested_authors'],
+                    expected,
+                )
+
+        Follow.objects.create(user=self.reader, author=self.popular)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggested_authors'], [self.niche])
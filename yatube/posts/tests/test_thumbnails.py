@@ -0,0 +1,185 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Автор')
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name='thumb.gif',
+                content=SMALL_GIF,
+                content_type='image/gif',
+            ),
+        )
+        wide = BytesIO()
+        Image.new('RGB', (1000, 400), 'white').save(wide, 'PNG')
+        cls.wide_post = Post.objects.create(
+            text='Пост с широкой картинкой',
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name='wide.png',
+                content=wide.getvalue(),
+                content_type='image/png',
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_page_renders_original_until_thumbnail_ready(self):
+        """До генерации миниатюры страница отдаёт оригинал."""
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            response = self.client.get(
+                reverse('posts:post_detail', args=(self.post.id,))
+            )
+        schedule.assert_called_once_with(self.post.image.name)
+        self.assertContains(response, self.post.image.url)
+        self.assertIsNone(thumbnails.cached_thumbnail(self.post.image))
+
+    def test_page_renders_generated_thumbnail(self):
+        """После генерации страница отдаёт миниатюру без генерации."""
+        thumbnails.generate(self.post.image.name)
+        thumbnail = thumbnails.cached_thumbnail(self.post.image)
+        self.assertIsNotNone(thumbnail)
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            response = self.client.get(
+                reverse('posts:post_detail', args=(self.post.id,))
+            )
+        schedule.assert_not_called()
+        self.assertContains(response, thumbnail.url)
+        self.assertContains(response, f'width="{thumbnail.x}"')
+        self.assertContains(response, f'height="{thumbnail.y}"')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_variants_not_wider_than_original(self):
+        """Варианты шире оригинала не создаются, кроме основного."""
+        thumbnails.generate(self.wide_post.image.name)
+        variants = thumbnails.lookup([self.wide_post.image])[
+            self.wide_post.image.name
+        ]
+        widths = {thumbnail.x for thumbnail in variants.values()}
+        self.assertEqual(widths, {320, 640, 960})
+        thumbnails.generate(self.post.image.name)
+        variants = thumbnails.lookup([self.post.image])[self.post.image.name]
+        self.assertEqual(list(variants), [(thumbnails.GEOMETRY, 'JPEG')])
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.wide_post.id,))
+        )
+        for width in widths:
+            self.assertContains(response, f' {width}w')
+        self.assertNotContains(response, ' 1920w')
+
+    def test_lookup_reads_all_variants_at_once(self):
+        """Все варианты миниатюр читаются из кеша одним обращением."""
+        thumbnails.generate(self.wide_post.image.name)
+        # Промахи по несозданным вариантам запоминаются в кеше.
+        thumbnails.lookup([self.wide_post.image])
+        kvstore_cache = thumbnails.default.kvstore.cache
+        with mock.patch.object(
+            kvstore_cache, 'get_many', wraps=kvstore_cache.get_many,
+        ) as get_many, self.assertNumQueries(0):
+            variants = thumbnails.lookup([self.wide_post.image])
+        get_many.assert_called_once()
+        self.assertEqual(len(variants[self.wide_post.image.name]), 3)
+
+    def test_page_reads_thumbnails_of_all_posts_at_once(self):
+        """Миниатюры всех постов страницы читаются одним lookup."""
+        Post.objects.bulk_create(
+            Post(
+                text=f'Ещё пост {number}',
+                author=self.user,
+                image=self.post.image.name,
+            )
+            for number in range(3)
+        )
+        with mock.patch(
+            'posts.thumbnails.lookup', wraps=thumbnails.lookup,
+        ) as lookup, mock.patch('posts.thumbnails.schedule'):
+            response = self.client.get(reverse('posts:index'))
+        lookup.assert_called_once()
+        self.assertContains(response, self.post.image.url, count=4)
+
+    def test_post_create_schedules_thumbnails(self):
+        """Сохранение поста с картинкой ставит миниатюры в очередь."""
+        self.client.force_login(self.user)
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            self.client.post(
+                reverse('posts:post_create'),
+                data={
+                    'text': 'Новый пост',
+                    'image': SimpleUploadedFile(
+                        name='new.gif',
+                        content=SMALL_GIF,
+                        content_type='image/gif',
+                    ),
+                },
+            )
+        schedule.assert_called_once_with(
+            Post.objects.get(text='Новый пост').image.name,
+        )
+
+    def test_version_bumped_once_per_drained_queue(self):
+        """Версия фрагментов сбрасывается, когда очередь опустела."""
+        names = ['first.gif', 'second.gif']
+        thumbnails._pending.update(names)
+        with mock.patch.object(
+            thumbnails, 'generate', return_value=True,
+        ), mock.patch.object(
+            thumbnails, 'bump_version',
+        ) as bump_version, mock.patch.object(thumbnails, 'connection'):
+            thumbnails.run(names[0])
+            bump_version.assert_not_called()
+            thumbnails.run(names[1])
+            bump_version.assert_called_once_with()
+
+    def test_broken_original_not_retried(self):
+        """Нечитаемый оригинал не ставится в очередь повторно."""
+        post = Post.objects.create(
+            text='Битая картинка',
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='broken.gif',
+                content=b'not an image',
+                content_type='image/gif',
+            ),
+        )
+        self.assertFalse(thumbnails.generate(post.image.name))
+        with mock.patch.object(thumbnails, 'get_executor') as get_executor:
+            thumbnails.submit(post.image.name)
+        get_executor.assert_not_called()
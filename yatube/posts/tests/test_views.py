@@ -1,15 +1,23 @@
 import shutil
 import tempfile
+from http import HTTPStatus
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.db import connection
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from posts.models import Follow, Group, Post
+from posts.following import following_ids
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.utils import QueryBudgetMixin
+from posts.views import COMMENTS_PER_PAGE
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -184,7 +192,7 @@ class PostsViewsTests(TestCase):
         self.assertEqual(post.group, self.group)
 
     def test_cache_index(self):
-        """Изменение информации в БД не меняет выдачу."""
+        """Изменение в БД в обход сигналов не меняет выдачу."""
         post = Post.objects.create(
             text='Тестовый пост для кеша',
             author=self.user,
@@ -192,12 +200,42 @@ class PostsViewsTests(TestCase):
         content_before = self.authorized_client.get(
             reverse('posts:index'),
         ).content
-        post.delete()
+        Post.objects.filter(pk=post.pk).update(text='Новый текст')
         content_after = self.authorized_client.get(
             reverse('posts:index'),
         ).content
         self.assertEqual(content_before, content_after)
 
+    def test_cache_invalidated_on_post_delete(self):
+        """Удаление поста сбрасывает закешированные фрагменты."""
+        post = Post.objects.create(
+            text='Тестовый пост для кеша',
+            author=self.user,
+        )
+        content_before = self.authorized_client.get(
+            reverse('posts:index'),
+        ).content
+        post.delete()
+        content_after = self.authorized_client.get(
+            reverse('posts:index'),
+        ).content
+        self.assertNotEqual(content_before, content_after)
+
+    def test_cache_invalidated_on_author_rename(self):
+        """Смена имени автора сбрасывает фрагменты, вход — нет."""
+        Post.objects.create(text='Тестовый пост для кеша', author=self.user)
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        etag = self.authorized_client.get(url)['ETag']
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.authorized_client.get(url)['ETag'], etag)
+        self.user.first_name = 'Переименованный'
+        self.user.save()
+        response = self.authorized_client.get(url)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Переименованный')
+
     def test_cache_index_view_changes(self):
         """Проверка работы кеша"""
         post = Post.objects.create(
@@ -253,16 +291,300 @@ class PostsPaginatorViewsTests(TestCase):
         ]
         cls.post = Post.objects.bulk_create(posts)
 
+    def setUp(self):
+        cache.clear()
+
     def test_check_posts(self):
         """Тест проверки отображения постов."""
         for link in self.check_posts:
-            with self.subTest(type=type):
-                for index, page in {'1': 10, '2': 3}.items():
-                    with self.subTest(page=page):
-                        self.authorized_client.get(
-                            link,
-                            {'page': index}
-                        )
+            with self.subTest(link=link):
+                response = self.authorized_client.get(link)
+                first_page = response.context['page_obj']
+                self.assertEqual(len(first_page), 10)
+                self.assertFalse(first_page.has_previous())
+                response = self.authorized_client.get(
+                    link,
+                    {'after': first_page.next_cursor},
+                )
+                second_page = response.context['page_obj']
+                self.assertEqual(len(second_page), 3)
+                self.assertFalse(second_page.has_next())
+                response = self.authorized_client.get(
+                    link,
+                    {'before': second_page.previous_cursor},
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    list(first_page),
+                )
+
+    def test_legacy_page_links(self):
+        """Старые ссылки ?page=N ведут на ту же страницу по курсору."""
+        for link in self.check_posts:
+            with self.subTest(link=link):
+                first_page = self.authorized_client.get(link).context[
+                    'page_obj'
+                ]
+                response = self.authorized_client.get(link, {'page': 2})
+                self.assertRedirects(
+                    response,
+                    f'{link}?after={first_page.next_cursor}',
+                )
+                response = self.authorized_client.get(link, {'page': 1})
+                self.assertRedirects(response, link)
+                for page in (3, 0, 'x'):
+                    response = self.authorized_client.get(
+                        link, {'page': page},
+                    )
+                    self.assertEqual(
+                        response.status_code, HTTPStatus.NOT_FOUND,
+                    )
+
+    def test_cursor_pages_with_equal_pub_date(self):
+        """Посты с одинаковой датой не теряются между страницами."""
+        Post.objects.update(pub_date=self.post[0].pub_date)
+        response = self.authorized_client.get(reverse('posts:index'))
+        first_page = response.context['page_obj']
+        response = self.authorized_client.get(
+            reverse('posts:index'),
+            {'after': first_page.next_cursor},
+        )
+        seen = [post.id for post in first_page]
+        seen += [post.id for post in response.context['page_obj']]
+        self.assertCountEqual(
+            seen,
+            Post.objects.values_list('id', flat=True),
+        )
+
+    def test_cache_key_depends_on_page(self):
+        """Каждая страница кешируется отдельно."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        cursor = response.context['page_obj'].next_cursor
+        second_page = self.authorized_client.get(
+            reverse('posts:index'),
+            {'after': cursor},
+        )
+        self.assertNotEqual(response.content, second_page.content)
+        self.assertContains(second_page, 'Тестовый текст поста номер 0')
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Неверный курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            reverse('posts:index'),
+            {'after': 'not-a-cursor'},
+        )
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 10)
+        self.assertFalse(page.has_previous())
+
+    def test_deep_page_does_not_count_posts(self):
+        """Страница по курсору не выполняет COUNT(*)."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        cursor = response.context['page_obj'].next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(
+                reverse('posts:index'),
+                {'after': cursor},
+            )
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+
+    def test_cursor_page_reads_index_from_cursor(self):
+        """
+        Страница по курсору ищет по индексу диапазоном от курсора,
+        а не читает индекс с начала.
+        """
+        def record(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        for link in self.check_posts:
+            with self.subTest(link=link):
+                response = self.authorized_client.get(link)
+                cursor = response.context['page_obj'].next_cursor
+                queries = []
+                with connection.execute_wrapper(record):
+                    self.authorized_client.get(link, {'after': cursor})
+                sql, params = next(
+                    (sql, params) for sql, params in queries
+                    if sql.startswith('SELECT')
+                    and 'FROM "posts_post"' in sql
+                    and 'LIMIT' in sql
+                )
+                with connection.cursor() as db_cursor:
+                    db_cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                    plan = ' '.join(row[-1] for row in db_cursor.fetchall())
+                self.assertIn('pub_date<?', plan)
+                self.assertNotIn('SCAN', plan)
+
+
+class PostsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Читатель')
+        cls.group = Group.objects.create(
+            title='Тестовое название',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'Автор {number}',
+                first_name=f'Имя {number}',
+            )
+            for number in range(15)
+        ]
+        for author in authors:
+            Follow.objects.create(user=cls.reader, author=author)
+            Post.objects.create(text='Текст', author=author, group=cls.group)
+        cls.post = Post.objects.first()
+        for author in authors:
+            Comment.objects.create(post=cls.post, author=author, text='Да')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        following_ids(self.reader)
+
+    def test_posts_views_query_budget(self):
+        """Число запросов страниц не зависит от числа постов на них."""
+        session_queries = 2
+        pages = {
+            reverse('posts:index'): (1, 1),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}): (2, 2),
+            reverse('posts:profile', kwargs={'username': 'Автор 0'}): (2, 3),
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': self.post.id},
+            ): (2, 2),
+            reverse('posts:follow_index'): (None, 3),
+            reverse(
+                'posts:comment_list',
+                kwargs={'post_id': self.post.id},
+            ): (2, 2),
+        }
+        for url, (guest_budget, user_budget) in pages.items():
+            with self.subTest(url=url):
+                if guest_budget is not None:
+                    self.assertQueryBudget(self.client, url, guest_budget)
+                self.assertQueryBudget(
+                    self.authorized_client,
+                    url,
+                    user_budget + session_queries,
+                )
+
+
+class PostCommentsViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Автор')
+        cls.post = Post.objects.create(text='Текст', author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Ответ {number}')
+            for number in range(COMMENTS_PER_PAGE * 2 + 5)
+        )
+        cls.texts = list(cls.post.comments.values_list('text', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def page_texts(self, comments):
+        return [comment.text for comment in comments]
+
+    def test_post_detail_shows_first_page_of_comments(self):
+        """Страница поста показывает только первую порцию комментариев."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            self.page_texts(comments),
+            self.texts[:COMMENTS_PER_PAGE],
+        )
+        self.assertContains(
+            response,
+            reverse('posts:comment_list', kwargs={'post_id': self.post.id})
+            + f'?after={comments.next_cursor}',
+        )
+
+    def test_fragment_returns_next_comments(self):
+        """Фрагмент отдаёт комментарии после курсора до последнего."""
+        url = reverse('posts:comment_list', kwargs={'post_id': self.post.id})
+        texts = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(url, {'after': cursor})
+            texts += self.page_texts(response.context['comments'])
+            data = self.client.get(url, {'after': cursor, 'format': 'json'})
+            cursor = data.json()['next']
+            self.assertEqual(data.json()['html'], response.content.decode())
+        self.assertEqual(texts, self.texts)
+
+    def test_fragment_for_missing_post(self):
+        """Фрагмент комментариев несуществующего поста — 404."""
+        response = self.client.get(
+            reverse('posts:comment_list', kwargs={'post_id': 0}),
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class PostsConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Автор')
+        cls.group = Group.objects.create(
+            title='Тестовое название',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Текст',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'Автор'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Неизменившаяся страница отдаётся как 304 без запросов к БД."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(len(queries), 0)
+
+    def test_validator_depends_on_data_and_user(self):
+        """Новый комментарий и другой пользователь меняют ETag."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.authorized_client.get(
+                    url,
+                    HTTP_IF_NONE_MATCH=etag,
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                Comment.objects.create(
+                    post=self.post,
+                    author=self.user,
+                    text='Да',
+                )
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
 
 
 class FollowViewsTest(TestCase):
@@ -337,3 +659,55 @@ class FollowViewsTest(TestCase):
             reverse('posts:follow_index')
         )
         self.assertNotIn(post, response.context['page_obj'].object_list)
+
+
+class FollowStateViewsTest(TransactionTestCase):
+    """
+    Кеш подписок сбрасывается после фиксации транзакции, поэтому
+    тесты идут без общей транзакции TestCase.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='Автор поста')
+        self.follower = User.objects.create(username='Подписчик')
+        self.reader = User.objects.create(username='Читатель')
+        Post.objects.create(text='Пост для подписки', author=self.author)
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_follow_state_cached_until_follow_changes(self):
+        """Отметки подписок берутся из кеша и сбрасываются при подписке."""
+        url = reverse('posts:index')
+        response = self.follower_client.get(url)
+        self.assertNotContains(response, 'вы подписаны')
+        self.assertEqual(
+            self.reader_client.get(url).context['cache_key'],
+            response.context['cache_key'],
+        )
+        self.follower_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author}),
+        )
+        self.assertContains(self.follower_client.get(url), 'вы подписаны')
+        self.assertNotContains(self.reader_client.get(url), 'вы подписаны')
+        self.assertNotContains(Client().get(url), 'вы подписаны')
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.follower_client.get(url)
+        self.assertEqual(
+            self.reader_client.get(url).context['cache_key'],
+            response.context['cache_key'],
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.follower_client.get(url)
+        self.assertFalse(any(
+            'posts_follow' in query['sql'] for query in queries
+        ))
+        self.follower_client.get(
+            reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.author},
+            ),
+        )
+        self.assertNotContains(self.follower_client.get(url), 'вы подписаны')
@@ -0,0 +1,17 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка, укладывается ли страница в бюджет SQL-запросов."""
+
+    def assertQueryBudget(self, client, url, budget, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data)
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context),
+            budget,
+            f'{url}: {len(context)} запросов вместо {budget}:\n{queries}',
+        )
+        return response
@@ -0,0 +1,272 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connection, transaction
+from django.utils.functional import SimpleLazyObject
+from PIL import features
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore
+
+from .cache import bump_version
+
+logger = logging.getLogger(__name__)
+
+WIDTH = 960
+HEIGHT = 339
+GEOMETRY = f'{WIDTH}x{HEIGHT}'
+OPTIONS = {'crop': 'center', 'upscale': True}
+# Ширины для srcset с пропорциями GEOMETRY; WebP — если его умеет Pillow.
+WIDTHS = (320, 640, 960, 1920)
+FORMATS = ('WEBP', 'JPEG') if features.check('webp') else ('JPEG',)
+VARIANTS = tuple(
+    (
+        f'{width}x{round(width * HEIGHT / WIDTH)}',
+        {**OPTIONS, 'format': image_format},
+    )
+    for image_format in FORMATS
+    for width in WIDTHS
+)
+WORKERS = 2
+# Оригинал, который не удалось разобрать, не ставится в очередь
+# снова до истечения FAILED_TIMEOUT.
+FAILED_KEY = 'posts:thumbnails:failed:{digest}'
+FAILED_TIMEOUT = 24 * 60 * 60
+
+_executor = None
+_pending = set()
+_generated = False
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def full_options(source, options):
+    """Опции миниатюры, дополненные умолчаниями, как в sorl.thumbnail."""
+    backend = default.backend
+    options = dict(options)
+    if settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_name(source, geometry, options):
+    """Имя файла миниатюры, которое вычислил бы sorl.thumbnail."""
+    return default.backend._get_thumbnail_filename(
+        source, geometry, full_options(source, options),
+    )
+
+
+def cached_thumbnail(file_, geometry=GEOMETRY, options=OPTIONS):
+    """Готовая миниатюра из KV-хранилища или None, без генерации."""
+    source = ImageFile(file_)
+    thumbnail = ImageFile(
+        thumbnail_name(source, geometry, options),
+        default.storage,
+    )
+    return default.kvstore.get(thumbnail)
+
+
+def lookup(images):
+    """
+    Готовые варианты миниатюр набора картинок: одно обращение
+    к кешу за все варианты и не больше одного запроса к БД на промахи.
+    Возвращает {имя картинки: {(геометрия, формат): ImageFile}}.
+    """
+    wanted = {}
+    result = {}
+    for image in images:
+        if not image:
+            continue
+        result[image.name] = {}
+        source = ImageFile(image)
+        for geometry, options in VARIANTS:
+            thumbnail = ImageFile(
+                thumbnail_name(source, geometry, options),
+                default.storage,
+            )
+            wanted[add_prefix(thumbnail.key)] = (
+                image.name,
+                (geometry, options['format']),
+            )
+    for key, value in read_many(list(wanted)).items():
+        name, variant = wanted[key]
+        result[name][variant] = deserialize_image_file(value)
+    return result
+
+
+def prefetch(posts):
+    """
+    Привязывает к постам страницы общий набор их миниатюр. Он читается
+    одним lookup при первом обращении из шаблона, а если страница
+    взята из кеша фрагментов, не читается вовсе.
+    """
+    variants = SimpleLazyObject(lambda: lookup(post.image for post in posts))
+    for post in posts:
+        post.thumbnail_variants = variants
+    return posts
+
+
+def read_many(keys):
+    """Сырые значения KV-хранилища sorl по ключам, без пустых."""
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBStore):
+        values = {key: kvstore._get_raw(key) for key in keys}
+        return {key: value for key, value in values.items() if value}
+    values = kvstore.cache.get_many(keys) if keys else {}
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(
+            KVStore.objects.filter(key__in=missing).values_list('key', 'value')
+        )
+        kvstore.cache.set_many(
+            {key: stored.get(key, EMPTY_VALUE) for key in missing},
+            settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+        values.update(stored)
+    return {
+        key: value for key, value in values.items()
+        if value != EMPTY_VALUE
+    }
+
+
+def variant_width(geometry):
+    return int(geometry.split('x')[0])
+
+
+def is_secondary(variant):
+    """Все варианты, кроме основного: GEOMETRY в JPEG."""
+    geometry, options = variant
+    return (geometry, options['format']) != (GEOMETRY, 'JPEG')
+
+
+def generate(name):
+    """
+    Создаёт варианты миниатюр изображения, декодируя оригинал один
+    раз: сначала основной, затем остальные не шире оригинала —
+    растянутые варианты ничего не добавляют к srcset. Возвращает,
+    появилось ли что-то новое. Оригинал, который не читается,
+    помечается и больше не ставится в очередь.
+    """
+    backend = default.backend
+    source = ImageFile(name)
+    variants = []
+    for geometry, options in sorted(VARIANTS, key=is_secondary):
+        options = full_options(source, options)
+        thumbnail = ImageFile(
+            backend._get_thumbnail_filename(source, geometry, options),
+            default.storage,
+        )
+        variants.append((geometry, options, thumbnail))
+    ready = read_many([
+        add_prefix(thumbnail.key) for _, _, thumbnail in variants
+    ])
+    missing = [
+        variant for variant in variants
+        if add_prefix(variant[2].key) not in ready
+    ]
+    if not missing:
+        return False
+    try:
+        source_image = default.engine.get_image(source)
+    except (OSError, SuspiciousFileOperation):
+        mark_failed(name)
+        return False
+    try:
+        source.set_size(default.engine.get_image_size(source_image))
+        default.kvstore.get_or_set(source)
+        image_info = default.engine.get_image_info(source_image)
+        for geometry, options, thumbnail in missing:
+            if is_secondary((geometry, options)) and (
+                variant_width(geometry) > source.width
+            ):
+                continue
+            options['image_info'] = image_info
+            if not thumbnail.exists():
+                backend._create_thumbnail(
+                    source_image, geometry, options, thumbnail,
+                )
+            default.kvstore.set(thumbnail, source)
+    finally:
+        default.engine.cleanup(source_image)
+    return True
+
+
+def failed_key(name):
+    digest = hashlib.md5(name.encode()).hexdigest()
+    return FAILED_KEY.format(digest=digest)
+
+
+def mark_failed(name):
+    cache.set(failed_key(name), True, FAILED_TIMEOUT)
+
+
+def run(name):
+    """
+    Задача пула: генерация вне запроса, соединение с БД закрывается.
+    Фрагменты с оригиналом вместо миниатюры сбрасываются один раз,
+    когда очередь опустела, а не после каждого изображения.
+    """
+    global _generated
+    generated = False
+    try:
+        generated = generate(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+        mark_failed(name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+            _generated = _generated or generated
+            drained = _generated and not _pending
+            if drained:
+                _generated = False
+        if drained:
+            bump_version()
+        connection.close()
+
+
+def submit(name):
+    if cache.get(failed_key(name)):
+        return
+    try:
+        exists = default.storage.exists(name)
+    except (OSError, SuspiciousFileOperation):
+        exists = False
+    if not exists:
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    get_executor().submit(run, name)
+
+
+def schedule(name):
+    """Ставит генерацию миниатюр в очередь после фиксации транзакции."""
+    if name:
+        transaction.on_commit(lambda: submit(name))
@@ -0,0 +1,258 @@
+import json
+from itertools import groupby
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from . import cache, counters, feed, search
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+UPDATE_BATCH_SIZE = 1000
+
+
+def export_records(chunk_size=BATCH_SIZE):
+    """
+    Записи выгрузки по порядку: группы, посты, комментарии, подписки,
+    чтобы при загрузке ссылки разрешались за один проход.
+    """
+    for slug, title, description in Group.objects.order_by('id').values_list(
+        'slug', 'title', 'description',
+    ).iterator(chunk_size=chunk_size):
+        yield {
+            'model': 'group',
+            'slug': slug,
+            'title': title,
+            'description': description,
+        }
+    for pk, text, pub_date, author, group, image in Post.objects.order_by(
+        'id',
+    ).values_list(
+        'id', 'text', 'pub_date', 'author__username', 'group__slug', 'image',
+    ).iterator(chunk_size=chunk_size):
+        yield {
+            'model': 'post',
+            'id': pk,
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group,
+            'image': image,
+        }
+    for pk, post, author, text, created in Comment.objects.order_by(
+        'id',
+    ).values_list(
+        'id', 'post_id', 'author__username', 'text', 'created',
+    ).iterator(chunk_size=chunk_size):
+        yield {
+            'model': 'comment',
+            'id': pk,
+            'post': post,
+            'author': author,
+            'text': text,
+            'created': created.isoformat(),
+        }
+    for user, author in Follow.objects.order_by('id').values_list(
+        'user__username', 'author__username',
+    ).iterator(chunk_size=chunk_size):
+        yield {'model': 'follow', 'user': user, 'author': author}
+
+
+def to_ndjson(record):
+    return json.dumps(record, ensure_ascii=False)
+
+
+class ImportConflict(Exception):
+    """Идентификатор из выгрузки уже занят другой строкой."""
+
+
+def create_with_dates(model, objects, field):
+    """
+    bulk_create с датами из выгрузки. auto_now_add перезаписывает дату
+    при вставке, поэтому она возвращается отдельным UPDATE, не трогая
+    поля модели, общие для всех потоков процесса.
+    """
+    dates = [getattr(obj, field) for obj in objects]
+    model.objects.bulk_create(objects)
+    for obj, date in zip(objects, dates):
+        setattr(obj, field, date)
+    model.objects.bulk_update(objects, [field], batch_size=UPDATE_BATCH_SIZE)
+
+
+class Importer:
+    """
+    Загрузка записей выгрузки пачками bulk_create, каждая пачка
+    в своей транзакции. Авторы и группы разрешаются по словарям
+    username -> id и slug -> id, недостающие пользователи создаются
+    без пароля. Идентификаторы постов и комментариев сохраняются,
+    а уже загруженные строки пропускаются, поэтому повторная
+    загрузка того же файла ничего не дублирует. Если id занят другой
+    строкой, загрузка прерывается с ImportConflict: иначе комментарии
+    выгрузки достались бы чужому посту.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.processed = dict.fromkeys(
+            ('group', 'post', 'comment', 'follow'), 0,
+        )
+
+    def load(self, records):
+        for model, group in groupby(records, key=lambda r: r['model']):
+            batch = []
+            for record in group:
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    self.flush(model, batch)
+                    batch = []
+            self.flush(model, batch)
+        self.finish()
+        return self.processed
+
+    def flush(self, model, batch):
+        if not batch:
+            return
+        with transaction.atomic():
+            getattr(self, f'import_{model}')(batch)
+        self.processed[model] += len(batch)
+
+    def resolve_users(self, usernames):
+        missing = set(usernames) - self.users.keys()
+        if not missing:
+            return
+        User.objects.bulk_create(
+            User(username=username, password=make_password(None))
+            for username in missing
+        )
+        self.users.update(
+            User.objects.filter(username__in=missing)
+            .values_list('username', 'id')
+        )
+
+    def import_group(self, batch):
+        Group.objects.bulk_create(
+            (
+                Group(
+                    slug=record['slug'],
+                    title=record['title'],
+                    description=record['description'],
+                )
+                for record in batch
+            ),
+            ignore_conflicts=True,
+        )
+        self.groups.update(
+            Group.objects.filter(
+                slug__in=[record['slug'] for record in batch],
+            ).values_list('slug', 'id')
+        )
+
+    def new_records(self, model, batch, fields, values):
+        """
+        Записи пачки, которых ещё нет в БД. Строка с тем же id и теми же
+        `fields`, что `values(record)`, — уже загруженная запись.
+        """
+        existing = {
+            pk: tuple(row)
+            for pk, *row in model.objects.filter(
+                pk__in=[record['id'] for record in batch],
+            ).values_list('pk', *fields)
+        }
+        new = []
+        for record in batch:
+            if record['id'] not in existing:
+                new.append(record)
+            elif existing[record['id']] != values(record):
+                raise ImportConflict(
+                    f'{model.__name__} с id {record["id"]} '
+                    f'уже есть в базе и не совпадает с выгрузкой.'
+                )
+        return new
+
+    def import_post(self, batch):
+        self.resolve_users(record['author'] for record in batch)
+        create_with_dates(
+            Post,
+            [
+                Post(
+                    id=record['id'],
+                    text=record['text'],
+                    pub_date=parse_datetime(record['pub_date']),
+                    author_id=self.users[record['author']],
+                    group_id=self.groups.get(record['group']),
+                    image=record.get('image') or '',
+                )
+                for record in self.new_records(
+                    Post,
+                    batch,
+                    ('author_id', 'text'),
+                    lambda record: (
+                        self.users[record['author']], record['text'],
+                    ),
+                )
+            ],
+            'pub_date',
+        )
+
+    def import_comment(self, batch):
+        self.resolve_users(record['author'] for record in batch)
+        create_with_dates(
+            Comment,
+            [
+                Comment(
+                    id=record['id'],
+                    post_id=record['post'],
+                    author_id=self.users[record['author']],
+                    text=record['text'],
+                    created=parse_datetime(record['created']),
+                )
+                for record in self.new_records(
+                    Comment,
+                    batch,
+                    ('post_id', 'author_id', 'text'),
+                    lambda record: (
+                        record['post'],
+                        self.users[record['author']],
+                        record['text'],
+                    ),
+                )
+            ],
+            'created',
+        )
+
+    def import_follow(self, batch):
+        self.resolve_users(
+            username
+            for record in batch
+            for username in (record['user'], record['author'])
+        )
+        Follow.objects.bulk_create(
+            (
+                Follow(
+                    user_id=self.users[record['user']],
+                    author_id=self.users[record['author']],
+                )
+                for record in batch
+                if record['user'] != record['author']
+            ),
+            ignore_conflicts=True,
+        )
+
+    def finish(self):
+        """Всё, что при обычной записи делают сигналы, одним проходом."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [Post, Comment],
+            ):
+                cursor.execute(sql)
+        counters.recount()
+        search.rebuild_index()
+        feed.fan_out_pending()
+        cache.bump_version()
@@ -1,70 +1,197 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_safe
 
+from core.ratelimit import rate_limited
+
+from . import comment_buffer, feed, search, thumbnails
+from .cache import conditional_page, fragment_key
+from .following import followed_authors, following_ids
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post
+from .paginator import CURSOR_ORDERING, CursorPaginator
+from .suggestions import suggested_authors
 
 User = get_user_model()
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+COMMENT_ORDERING = ('created', 'id')
+
+
+def get_page_object(model, params, posts_per_page):
+    paginator = CursorPaginator(model, posts_per_page)
+    page = paginator.cursor_page(params.get('after'), params.get('before'))
+    thumbnails.prefetch(page.object_list)
+    return page
 
 
-def get_page_object(model, page_number, posts_per_page):
-    paginator = Paginator(model, posts_per_page)
-    return paginator.get_page(page_number)
+def legacy_page_redirect(request, sources, ordering=CURSOR_ORDERING):
+    """
+    Старые ссылки `?page=N` ведут на ту же страницу по курсору,
+    несуществующий номер страницы — 404. None, если `page` не задан.
+    """
+    number = request.GET.get('page')
+    if number is None:
+        return None
+    try:
+        number = int(number)
+    except ValueError:
+        raise Http404
+    if number < 1:
+        raise Http404
+    cursor = CursorPaginator(
+        sources, POSTS_PER_PAGE, ordering,
+    ).page_cursor(number)
+    if cursor is None:
+        raise Http404
+    params = request.GET.copy()
+    del params['page']
+    if cursor:
+        params['after'] = cursor
+    query = params.urlencode()
+    return redirect(f'{request.path}?{query}' if query else request.path)
+
+
+def get_comments_context(request, post):
+    """
+    Комментарии поста по порядку, страница после курсора `after`.
+    На последней странице — и ещё не записанные комментарии автора.
+    """
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_PER_PAGE,
+        COMMENT_ORDERING,
+    )
+    comments = paginator.cursor_page(request.GET.get('after'))
+    pending = []
+    if not comments.has_next():
+        pending = comment_buffer.pending(post, request.user)
+    return {
+        'post': post,
+        'comments': comments,
+        'pending_comments': pending,
+    }
 
 
+@conditional_page
 def index(request):
-    post_list = Post.objects.all()
-    page_number = request.GET.get('page')
+    post_list = Post.objects.select_related('author', 'group')
+    legacy = legacy_page_redirect(request, post_list)
+    if legacy:
+        return legacy
+    page = get_page_object(post_list, request.GET, POSTS_PER_PAGE)
     context = {
-        'page_obj': get_page_object(post_list, page_number, POSTS_PER_PAGE),
+        'page_obj': page,
+        'following_ids': following_ids(request.user),
+        'cache_key': fragment_key(
+            request,
+            followed_authors(page, request.user),
+        ),
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.filter(group=group)
-    page_number = request.GET.get('page')
+    post_list = Post.objects.select_related('author', 'group').filter(
+        group=group,
+    )
+    legacy = legacy_page_redirect(request, post_list)
+    if legacy:
+        return legacy
+    page = get_page_object(post_list, request.GET, POSTS_PER_PAGE)
     context = {
         'group': group,
-        'page_obj': get_page_object(post_list, page_number, POSTS_PER_PAGE),
+        'page_obj': page,
+        'following_ids': following_ids(request.user),
+        'cache_key': fragment_key(
+            request,
+            group.pk,
+            followed_authors(page, request.user),
+        ),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = Post.objects.filter(author=author)
-    page_number = request.GET.get('page')
-
-    following = request.user.is_authenticated and (
-        author.following.filter(user=request.user).exists()
+    author = get_object_or_404(
+        User.objects.select_related('counters'),
+        username=username,
     )
+    post_list = Post.objects.select_related('author', 'group').filter(
+        author=author,
+    )
+    legacy = legacy_page_redirect(request, post_list)
+    if legacy:
+        return legacy
 
     context = {
         'author': author,
-        'page_obj': get_page_object(post_list, page_number, POSTS_PER_PAGE),
-        'following': following,
+        'page_obj': get_page_object(post_list, request.GET, POSTS_PER_PAGE),
+        'following': author.pk in following_ids(request.user),
+        'suggested_authors': suggested_authors(request.user, author.pk),
+        'cache_key': fragment_key(request, author.pk),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_page
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group'),
+        id=post_id,
+    )
     context = {
-        'post': post,
         'form': CommentForm(),
-        'comments': comments,
+        **get_comments_context(request, post),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@require_safe
+@conditional_page
+def comment_list(request, post_id):
+    """
+    Следующая порция комментариев для подгрузки: фрагмент HTML
+    или, при `format=json`, он же вместе с курсором следующей порции.
+    """
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = get_comments_context(request, post)
+    template = 'posts/includes/comments.html'
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'html': render_to_string(template, context, request),
+            'next': context['comments'].next_cursor or None,
+        })
+    return render(request, template, context)
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(search.ranked_post_ids(query), POSTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    ids = [row['post_id'] for row in page_obj]
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    page_obj.object_list = thumbnails.prefetch(
+        [posts[pk] for pk in ids if pk in posts],
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@rate_limited('post')
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -73,7 +200,9 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
+            thumbnails.schedule(post.image.name)
         return redirect('posts:profile', request.user)
     form = PostForm()
     return render(request, 'posts/post_create.html', {'form': form})
@@ -91,6 +220,8 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post.image.name)
         return redirect('posts:post_detail', post_id)
     return render(
         request,
@@ -103,6 +234,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@rate_limited('comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -110,18 +242,27 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        if comment_buffer.is_enabled():
+            comment_buffer.add(comment)
+        else:
+            with transaction.atomic():
+                comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    page_number = request.GET.get('page')
-    post_list = Post.objects.filter(
-        author__following__user=request.user
+    legacy = legacy_page_redirect(
+        request, feed.feed_sources(request.user), feed.FEED_ORDERING,
     )
+    if legacy:
+        return legacy
+    page_obj = feed.get_feed_page(request.user, request.GET, POSTS_PER_PAGE)
+    thumbnails.prefetch(page_obj.object_list)
     context = {
-        'page_obj': get_page_object(post_list, page_number, POSTS_PER_PAGE)
+        'page_obj': page_obj,
+        'suggested_authors': suggested_authors(request.user),
+        'cache_key': fragment_key(request, request.user.pk),
     }
     return render(request, 'posts/follow.html', context)
 
@@ -130,7 +271,8 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', author)
 
 
@@ -141,5 +283,6 @@ def profile_unfollow(request, username):
         user=request.user,
         author__username=username
     )
-    follow.delete()
+    with transaction.atomic():
+        follow.delete()
     return redirect('posts:profile', username)